@@ -14,8 +14,13 @@ from .agents import (
     get_default_agent_id,
     get_agents_info,
 )
-from .subagents import load_subagents, get_subagents_info
-from .config import load_config
+from .subagents import (
+    load_subagents,
+    load_subagent_index,
+    load_subagent_definition,
+    get_subagents_info,
+)
+from .config import load_config, get_active_provider
 from .storage import SessionStorage, SessionData
 from .hook import create_permission_hook, create_sandbox_hook, get_permission_info
 
@@ -28,8 +33,11 @@ __all__ = [
     'get_default_agent_id',
     'get_agents_info',
     'load_subagents',
+    'load_subagent_index',
+    'load_subagent_definition',
     'get_subagents_info',
     'load_config',
+    'get_active_provider',
     'SessionStorage',
     'SessionData',
     'create_permission_hook',
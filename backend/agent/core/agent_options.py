@@ -2,8 +2,12 @@
 
 Simplified configuration that maps YAML config directly to SDK options.
 """
+import copy
+import dataclasses
 import logging
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Callable, Awaitable, Union
 
@@ -12,8 +16,15 @@ from claude_agent_sdk.types import PermissionResultAllow, PermissionResultDeny,
 
 from agent import PROJECT_ROOT
 from agent.core.agents import load_agent_config, AGENTS_CONFIG_PATH
-from agent.core.subagents import load_subagents
+from agent.core.config import get_active_provider
+from agent.core.subagents import (
+    SUBAGENTS_CONFIG_PATH,
+    clear_subagents_cache,
+    load_subagent_definition,
+    load_subagents,
+)
 from agent.core.hook import create_permission_hook
+from agent.core.yaml_utils import clear_yaml_cache
 
 logger = logging.getLogger(__name__)
 
@@ -26,14 +37,60 @@ CanUseToolCallback = Callable[
 ]
 
 
+# Known non-critical SDK subprocess errors, matched in a single regex pass:
+# - MCP servers that don't support resources/list (expected for some servers)
+# - 1P event logging / export failures (telemetry)
+_IGNORED_STDERR_RE = re.compile(
+    r"Failed to fetch resources.*MCP error -32601"
+    r"|MCP error -32601.*Failed to fetch resources"
+    r"|1P event logging"
+    r"|Failed to export"
+)
+
+# agents.yaml keys copied to SDK options when set, as (config key, option name)
+_PASSTHROUGH_OPTIONS = (
+    ("setting_sources", "setting_sources"),
+    ("tools", "allowed_tools"),
+    ("disallowed_tools", "disallowed_tools"),
+    ("permission_mode", "permission_mode"),
+    ("include_partial_messages", "include_partial_messages"),
+)
+
+# Immutable for the process lifetime, so computed once at import
+_PROJECT_ROOT_STR = str(PROJECT_ROOT)
+_AGENTS_YAML_DIR = AGENTS_CONFIG_PATH.parent
+_DEBUG_ENABLED = bool(os.getenv("DEBUG"))
+_DEBUG_EXTRA_ARGS: dict[str, str | None] = {"debug-to-stderr": None}
+
+# Config files the cached options are built from, and their mtimes when
+# the cache was last filled
+_OPTIONS_CONFIG_PATHS = (AGENTS_CONFIG_PATH, SUBAGENTS_CONFIG_PATH)
+_cached_options_mtimes: tuple[int, ...] | None = None
+
+
+def _stderr_callback(line: str) -> None:
+    """Log SDK subprocess stderr lines that indicate real errors."""
+    # Only log actual errors, not debug/warning messages
+    if "[ERROR]" not in line:
+        return
+    # Filter out known non-critical errors
+    if _IGNORED_STDERR_RE.search(line):
+        return
+    logger.error(f"SDK subprocess: {line}")
+
+
 def get_project_root() -> str:
     """Get the project root directory (where .claude/skills/ is located)."""
-    return str(PROJECT_ROOT)
+    return _PROJECT_ROOT_STR
 
 
+@lru_cache(maxsize=1024)
 def resolve_path(path: str | None) -> str | None:
     """Resolve a path, handling relative paths from agents.yaml location.
 
+    Results are cached, so each distinct relative path is resolved against
+    the filesystem at most once per process.
+
     Args:
         path: Path string. Can be:
             - None: Returns None
@@ -46,13 +103,12 @@ def resolve_path(path: str | None) -> str | None:
     if path is None:
         return None
 
-    p = Path(path)
-    if p.is_absolute():
-        return str(p)
+    # Absolute paths need no Path object
+    if os.path.isabs(path):
+        return path
 
     # Resolve relative to agents.yaml directory
-    yaml_dir = AGENTS_CONFIG_PATH.parent
-    resolved = (yaml_dir / p).resolve()
+    resolved = (_AGENTS_YAML_DIR / path).resolve()
     return str(resolved)
 
 
@@ -104,32 +160,93 @@ def create_agent_sdk_options(
             return {}  # Allow other tools
         options = create_agent_sdk_options(can_use_tool=my_callback)
     """
+    # Provider env vars (ANTHROPIC_AUTH_TOKEN, ANTHROPIC_BASE_URL) must be
+    # configured before the SDK client starts; this is a no-op after first use.
+    get_active_provider()
+
+    # Both paths read subagent definitions through caches keyed on the YAML
+    # files' mtimes, so check them first either way
+    _invalidate_stale_options()
+
+    # Options without per-session state are identical for a given agent, so
+    # they are built once and handed out as copies.
+    if resume_session_id is None and can_use_tool is None:
+        return _copy_options(_build_cached_agent_sdk_options(agent_id))
+    return _build_agent_sdk_options(agent_id, resume_session_id, can_use_tool)
+
+
+def _config_mtimes() -> tuple[int, ...]:
+    """Return st_mtime_ns of each config file, 0 for missing files."""
+    mtimes = []
+    for path in _OPTIONS_CONFIG_PATHS:
+        try:
+            mtimes.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(0)
+    return tuple(mtimes)
+
+
+def _invalidate_stale_options() -> None:
+    """Drop cached options and subagents if agents.yaml or subagents.yaml changed."""
+    global _cached_options_mtimes
+    mtimes = _config_mtimes()
+    if mtimes != _cached_options_mtimes:
+        _build_cached_agent_sdk_options.cache_clear()
+        clear_subagents_cache()
+        _cached_options_mtimes = mtimes
+
+
+def _copy_options(options: ClaudeAgentOptions) -> ClaudeAgentOptions:
+    """Copy cached options so nested dicts and lists are private to the caller.
+
+    A plain copy.deepcopy is not possible because the options hold stream
+    handles such as debug_stderr; only container fields are deep-copied.
+    """
+    return dataclasses.replace(options, **{
+        field.name: copy.deepcopy(value)
+        for field in dataclasses.fields(options)
+        if isinstance(value := getattr(options, field.name), (dict, list, set))
+    })
+
+
+@lru_cache(maxsize=32)
+def _build_cached_agent_sdk_options(agent_id: str | None) -> ClaudeAgentOptions:
+    """Build and cache options for an agent with no session-specific state."""
+    return _build_agent_sdk_options(agent_id, None, None)
+
+
+def _build_agent_sdk_options(
+    agent_id: str | None,
+    resume_session_id: str | None,
+    can_use_tool: CanUseToolCallback | None,
+) -> ClaudeAgentOptions:
+    """Build ClaudeAgentOptions from agents.yaml. See create_agent_sdk_options."""
     config = load_agent_config(agent_id)
     project_root = get_project_root()
 
     # Resolve cwd (supports relative paths from agents.yaml)
     effective_cwd = resolve_path(config.get("cwd")) or project_root
 
-    options = {
-        "cwd": effective_cwd,
-        "setting_sources": config.get("setting_sources"),
-        "allowed_tools": config.get("tools"),
-        "disallowed_tools": config.get("disallowed_tools"),
-        "permission_mode": config.get("permission_mode"),
-        "include_partial_messages": config.get("include_partial_messages"),
-        "add_dirs": config.get("allowed_directories") or None,
-        "mcp_servers": config.get("mcp_servers") or None,
-    }
-
-    # Build subagents from subagents.yaml, filtered by agent config
-    all_subagents = load_subagents()
+    # Build options sparsely: only keys with a configured value are set
+    options: dict[str, Any] = {"cwd": effective_cwd}
+    for config_key, option_key in _PASSTHROUGH_OPTIONS:
+        if (value := config.get(config_key)) is not None:
+            options[option_key] = value
+    # Empty values are treated as unset for these
+    if add_dirs := config.get("allowed_directories"):
+        options["add_dirs"] = add_dirs
+    if mcp_servers := config.get("mcp_servers"):
+        options["mcp_servers"] = mcp_servers
+
+    # Build subagents from subagents.yaml, filtered by agent config.
+    # Only the requested definitions are loaded when a filter is present.
     if subagent_names := config.get("subagents"):
         options["agents"] = {
-            name: defn for name, defn in all_subagents.items()
-            if name in subagent_names
+            name: defn for name in subagent_names
+            if (defn := load_subagent_definition(name)) is not None
         }
     else:
-        options["agents"] = all_subagents
+        options["agents"] = dict(load_subagents())
 
     # System prompt append mode
     if system_prompt := config.get("system_prompt"):
@@ -141,16 +258,13 @@ def create_agent_sdk_options(
 
     # Add permission hooks if configured in YAML
     if config.get("with_permissions"):
-        # Resolve allowed_directories (supports relative paths)
-        allowed_dirs = [
-            resolve_path(d) or d
-            for d in (config.get("allowed_directories") or [])
-        ]
-        # Always include cwd and /tmp as defaults
-        if effective_cwd not in allowed_dirs:
-            allowed_dirs = [effective_cwd] + allowed_dirs
-        if "/tmp" not in allowed_dirs:
-            allowed_dirs = allowed_dirs + ["/tmp"]
+        # Resolve allowed_directories (supports relative paths).
+        # Always include cwd first and /tmp last; dict keys dedupe in order.
+        allowed_dirs = list(dict.fromkeys([
+            effective_cwd,
+            *(resolve_path(d) or d for d in (config.get("allowed_directories") or [])),
+            "/tmp",
+        ]))
         options["hooks"] = {
             'PreToolUse': [create_permission_hook(allowed_directories=allowed_dirs)]
         }
@@ -163,23 +277,24 @@ def create_agent_sdk_options(
         options["can_use_tool"] = can_use_tool
 
     # Add stderr callback to capture subprocess errors for debugging
-    def stderr_callback(line: str) -> None:
-        # Only log actual errors, not debug/warning messages
-        if "[ERROR]" in line:
-            # Filter out known non-critical MCP errors
-            if "Failed to fetch resources" in line and "MCP error -32601" in line:
-                # MCP server doesn't support resources/list - this is expected for some servers
-                return
-            # Filter out 1P event logging errors (telemetry failures)
-            if "1P event logging" in line or "Failed to export" in line:
-                return
-            logger.error(f"SDK subprocess: {line}")
-
-    options["stderr"] = stderr_callback
+    options["stderr"] = _stderr_callback
 
     # Only enable debug mode if DEBUG env var is set
-    if os.getenv("DEBUG"):
-        options["extra_args"] = {"debug-to-stderr": None}
+    if _DEBUG_ENABLED:
+        options["extra_args"] = dict(_DEBUG_EXTRA_ARGS)
+
+    return ClaudeAgentOptions(**options)
 
-    # Filter out None and empty values
-    return ClaudeAgentOptions(**{k: v for k, v in options.items() if v is not None})
+
+def clear_options_cache() -> None:
+    """Clear cached SDK options along with the YAML and subagent caches.
+
+    Call this if agents.yaml or subagents.yaml has been modified and cached
+    options need to be rebuilt.
+    """
+    global _cached_options_mtimes
+    _build_cached_agent_sdk_options.cache_clear()
+    _cached_options_mtimes = None
+    resolve_path.cache_clear()
+    clear_subagents_cache()
+    clear_yaml_cache()
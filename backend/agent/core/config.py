@@ -3,6 +3,7 @@
 Loads environment and YAML configuration for provider settings.
 """
 import os
+from functools import cache, lru_cache
 from typing import Any
 
 from dotenv import load_dotenv
@@ -10,11 +11,19 @@ from dotenv import load_dotenv
 from agent import PROJECT_ROOT
 from agent.core.yaml_utils import load_yaml_config
 
+# Load .env on import, as before provider resolution became lazy, so code
+# reading os.environ before the first options build sees the same values
+load_dotenv(PROJECT_ROOT / ".env", override=True)
+
 
 def load_config() -> str:
     """Load environment and configuration, returning the active provider name."""
     load_dotenv(PROJECT_ROOT / ".env", override=True)
+    return _resolve_provider()
+
 
+def _resolve_provider() -> str:
+    """Read config.yaml and configure the active provider's environment."""
     config = load_yaml_config(PROJECT_ROOT / "config.yaml")
 
     provider = config.get("provider", "claude")
@@ -22,21 +31,43 @@ def load_config() -> str:
     if provider == "claude":
         return provider
 
-    provider_config = config.get("providers", {}).get(provider, {})
-    _configure_provider(provider_config)
+    _configure_provider(provider)
 
     return provider
 
 
-def _configure_provider(provider_config: dict[str, Any]) -> None:
+@lru_cache(maxsize=8)
+def _provider_env_keys(provider: str) -> tuple[str | None, str | None]:
+    """Return the (env_key, base_url_env) variable names for a provider."""
+    config = load_yaml_config(PROJECT_ROOT / "config.yaml")
+    provider_config = config.get("providers", {}).get(provider, {})
+    return provider_config.get("env_key"), provider_config.get("base_url_env")
+
+
+def _configure_provider(provider: str) -> None:
     """Set environment variables for non-Claude providers."""
-    if api_key := os.getenv(provider_config.get("env_key", "")):
+    env_key, base_url_env = _provider_env_keys(provider)
+
+    if env_key and (api_key := os.getenv(env_key)):
         os.environ["ANTHROPIC_AUTH_TOKEN"] = api_key
 
-    if base_url_env := provider_config.get("base_url_env"):
-        if base_url := os.getenv(base_url_env):
-            os.environ["ANTHROPIC_BASE_URL"] = base_url
+    if base_url_env and (base_url := os.getenv(base_url_env)):
+        os.environ["ANTHROPIC_BASE_URL"] = base_url
+
+
+@cache
+def get_active_provider() -> str:
+    """Return the active provider name, resolving it on first use.
+
+    config.yaml is read lazily rather than on module import so that importers
+    who don't need provider settings skip it; .env is already loaded at
+    import. The result is cached for the process lifetime.
+    """
+    return _resolve_provider()
 
 
-# Load config on module import
-ACTIVE_PROVIDER = load_config()
+def __getattr__(name: str) -> Any:
+    """Resolve ACTIVE_PROVIDER lazily for backwards compatibility."""
+    if name == "ACTIVE_PROVIDER":
+        return get_active_provider()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
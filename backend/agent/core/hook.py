@@ -23,32 +23,106 @@ Typical usage:
     )
 """
 import re
-from typing import Any
+from functools import lru_cache
+from typing import Any, Iterable, Sequence
 
 from claude_agent_sdk import HookMatcher
 
 
 # Default bash commands that are blocked for safety.
 # These commands modify the filesystem and should use Write/Edit tools instead.
-DEFAULT_BLOCKED_COMMANDS = [
+DEFAULT_BLOCKED_COMMANDS = (
     "rm ",      # Remove files/directories
     "mv ",      # Move/rename files
     "cp ",      # Copy files
     "mkdir ",   # Create directories
     "rmdir ",   # Remove directories
     "touch ",   # Create/modify file timestamps
-]
+)
 
 # Extended list for strict sandbox mode - includes network operations
-SANDBOX_BLOCKED_COMMANDS = DEFAULT_BLOCKED_COMMANDS + [
+SANDBOX_BLOCKED_COMMANDS = DEFAULT_BLOCKED_COMMANDS + (
     "wget ",    # Download files from web
     "curl ",    # Transfer data (can write files)
-]
+)
+
+# Bash output redirection: > file, >> file, with optional whitespace
+_REDIRECT_RE = re.compile(r'>>?\s?([^\s&|;]+)')
+
+# Max cached permission decisions per hook (per Write/Edit and per Bash)
+_DECISION_CACHE_SIZE = 1024
+
+# Shared fallback for calls without tool_input; checkers only call .get()
+# on it, so a single instance is never mutated
+_EMPTY_TOOL_INPUT: dict[str, Any] = {}
+
+# Above this many allowed directories, prefix checks go through a trie
+_PREFIX_TRIE_THRESHOLD = 16
+
+
+class _PrefixTrie:
+    """Path-component trie answering "does any stored prefix start this path?".
+
+    Gives the same result as str.startswith(tuple_of_prefixes), but lookup
+    cost depends on the depth of the path rather than the number of stored
+    prefixes. Each prefix is stored as its full components plus a final
+    partial component, so "/tmp" still matches "/tmpfile" exactly like
+    startswith does.
+    """
+
+    __slots__ = ("_children", "_tails")
+
+    def __init__(self, prefixes: Iterable[str] = ()) -> None:
+        self._children: dict[str, _PrefixTrie] = {}
+        self._tails: tuple[str, ...] = ()
+        for prefix in prefixes:
+            self.insert(prefix)
+
+    def insert(self, prefix: str) -> None:
+        """Add a prefix to the trie."""
+        *parts, tail = prefix.split("/")
+        node = self
+        for part in parts:
+            node = node._children.setdefault(part, _PrefixTrie())
+        node._tails += (tail,)
+
+    def contains_prefix_of(self, path: str) -> bool:
+        """Return True if any stored prefix is a prefix of path."""
+        node = self
+        for part in path.split("/"):
+            if node._tails and part.startswith(node._tails):
+                return True
+            node = node._children.get(part)
+            if node is None:
+                return False
+        return False
+
+
+def _block(message: str) -> dict[str, Any]:
+    """Build a fresh hook response that blocks the tool call."""
+    return {'decision': 'block', 'systemMessage': message}
+
+
+def _minimize_prefixes(prefixes: Iterable[str]) -> tuple[str, ...]:
+    """Drop duplicate prefixes and prefixes already covered by a shorter one.
+
+    If "/a" is allowed, "/a/b" can never change a startswith() decision, so
+    only "/a" is kept. Paths are compared as plain strings (no normalization)
+    to preserve the exact startswith() semantics, e.g. a trailing slash.
+    """
+    minimized: list[str] = []
+    for prefix in sorted(set(prefixes)):
+        # In sorted order, everything starting with a kept prefix follows it
+        # directly, so comparing against the last kept prefix is sufficient.
+        if minimized and prefix.startswith(minimized[-1]):
+            continue
+        minimized.append(prefix)
+    return tuple(minimized)
 
 
 def create_permission_hook(
     allowed_directories: list[str] | None = None,
-    block_bash_commands: list[str] | None = None,
+    block_bash_commands: Sequence[str] | None = None,
     allow_bash_redirection: bool = False,
 ) -> HookMatcher:
     """Create a pre-tool-use hook for controlling agent permissions.
@@ -70,7 +144,7 @@ def create_permission_hook(
             under that directory tree.
             Defaults to [PROJECT_ROOT, "/tmp"] for convenience.
 
-        block_bash_commands: List of bash command prefixes to block.
+        block_bash_commands: Sequence of bash command prefixes to block.
             Each string is matched against the beginning of command tokens.
             For example, "rm " blocks "rm file.txt" but not "rm" as a
             standalone word in a larger command.
@@ -116,17 +190,113 @@ def create_permission_hook(
         is automatically configured with sensible defaults based on the
         agent's cwd and allowed_directories.
     """
-    from agent import PROJECT_ROOT
-
     # Apply default allowed directories if not specified
     # Default provides safe access to project files and temporary storage
     if allowed_directories is None:
+        from agent import PROJECT_ROOT
         allowed_directories = [str(PROJECT_ROOT), "/tmp"]
 
-    # Apply default blocked commands if not specified
+    # Apply default blocked commands if not specified (immutable, no copy needed)
     if block_bash_commands is None:
-        block_bash_commands = DEFAULT_BLOCKED_COMMANDS.copy()
+        block_bash_commands = DEFAULT_BLOCKED_COMMANDS
+
+    # Denial message fragments never change for the hook's lifetime
+    allowed_str = ", ".join(allowed_directories)
+    blocked_str = ", ".join(block_bash_commands)
+
+    # str.startswith accepts a tuple and checks every prefix in C; for large
+    # directory lists a component trie keeps lookups independent of N
+    allowed_prefixes = _minimize_prefixes(allowed_directories)
+    if len(allowed_prefixes) > _PREFIX_TRIE_THRESHOLD:
+        is_allowed_path = _PrefixTrie(allowed_prefixes).contains_prefix_of
+    else:
+        def is_allowed_path(path: str) -> bool:
+            return path.startswith(allowed_prefixes)
+
+    # All blocked patterns combined into one alternation, scanned in one pass
+    blocked_re = (
+        re.compile("|".join(re.escape(p) for p in block_bash_commands))
+        if block_bash_commands else None
+    )
+
+    def allow(_tool_input: dict[str, Any]) -> dict[str, Any]:
+        """Allow the tool without restrictions."""
+        return {}
+
+    # Decisions depend only on the path/command and this hook's fixed
+    # configuration, so repeated tool calls are answered from cache.
+    # Each returns the denial message, or None when the call is allowed.
+    @lru_cache(maxsize=_DECISION_CACHE_SIZE)
+    def decide_path(file_path: str) -> str | None:
+        """Decide a Write/Edit target against allowed directories."""
+        # Allow if the file path starts with any allowed directory
+        if is_allowed_path(file_path):
+            return None
+
+        # Block writes outside allowed directories
+        return (
+            f'Write/Edit access denied: {file_path}\n'
+            f'Allowed directories: {allowed_str}'
+        )
+
+    @lru_cache(maxsize=_DECISION_CACHE_SIZE)
+    def decide_bash(command: str) -> str | None:
+        """Decide a Bash command against blocked patterns and redirections."""
+        # Check for blocked command patterns
+        if blocked_re is not None and blocked_re.search(command):
+            return (
+                f'Bash command blocked: {command}\n'
+                f'Blocked patterns: {blocked_str}\n'
+                f'Use Write/Edit tools for file operations.'
+            )
+
+        # Check for file redirection if not allowed; most commands contain
+        # no '>' at all, so skip the regex scan for them
+        if not allow_bash_redirection and '>' in command:
+            redirected_files = _REDIRECT_RE.findall(command)
+
+            for file_path in redirected_files:
+                # Strip quotes from the path
+                file_path = file_path.strip('\'"')
+
+                # Always allow redirection to device files (/dev/null, etc.)
+                if file_path.startswith("/dev/"):
+                    continue
+
+                # Check if the file is within allowed directories
+                if not is_allowed_path(file_path):
+                    return (
+                        f'Bash redirection denied: {file_path}\n'
+                        f'Can only redirect to: {allowed_str}'
+                    )
 
+        # Allow the bash command
+        return None
+
+    def check_path(tool_input: dict[str, Any]) -> dict[str, Any]:
+        """Check Write and Edit operations against allowed directories."""
+        message = decide_path(tool_input.get("file_path", ""))
+        return {} if message is None else _block(message)
+
+    def check_bash(tool_input: dict[str, Any]) -> dict[str, Any]:
+        """Check Bash commands for dangerous operations."""
+        message = decide_bash(tool_input.get("command", ""))
+        return {} if message is None else _block(message)
+
+    # Tool name -> checker. Read is always safe; tools not listed here
+    # (Grep, Glob, Task, Skill, WebSearch, etc.) are either read-only or
+    # have their own safety measures, so they are allowed too.
+    checks = {
+        "Read": allow,
+        "Write": check_path,
+        "Edit": check_path,
+        "Bash": check_bash,
+    }
+
+    # The SDK awaits every hook callback (HookCallback returns an Awaitable),
+    # so this must stay a coroutine function. Everything that doesn't depend
+    # on the tool call is computed above, keeping the per-call body to
+    # dict lookups and C-level string/regex calls.
     async def pre_tool_use_hook(
         input_data: dict[str, Any],
         _tool_use_id: str | None,
@@ -150,82 +320,9 @@ def create_permission_hook(
                 - decision: "block" to prevent execution
                 - systemMessage: Explanation shown to the agent
         """
-        tool_name = input_data.get('tool_name', '')
-        tool_input = input_data.get('tool_input', {})
-
-        # Read operations are always safe - no restrictions
-        if tool_name == "Read":
-            return {}
-
-        # Check Write and Edit operations against allowed directories
-        if tool_name in ["Write", "Edit"]:
-            file_path = tool_input.get("file_path", "")
-
-            # Allow if the file path starts with any allowed directory
-            for allowed_dir in allowed_directories:
-                if file_path.startswith(allowed_dir):
-                    return {}
-
-            # Block writes outside allowed directories
-            return {
-                'decision': 'block',
-                'systemMessage': (
-                    f'Write/Edit access denied: {file_path}\n'
-                    f'Allowed directories: {", ".join(allowed_directories)}'
-                )
-            }
-
-        # Check Bash commands for dangerous operations
-        if tool_name == "Bash":
-            command = tool_input.get("command", "")
-
-            # Check for blocked command patterns
-            for pattern in block_bash_commands:
-                if pattern in command:
-                    return {
-                        'decision': 'block',
-                        'systemMessage': (
-                            f'Bash command blocked: {command}\n'
-                            f'Blocked patterns: {", ".join(block_bash_commands)}\n'
-                            f'Use Write/Edit tools for file operations.'
-                        )
-                    }
-
-            # Check for file redirection if not allowed
-            if not allow_bash_redirection:
-                # Pattern matches: > file, >> file, with optional whitespace
-                redirect_pattern = r'(?:>\s?|\>\>\s?)([^\s&|;]+)'
-                redirected_files = re.findall(redirect_pattern, command)
-
-                for file_path in redirected_files:
-                    # Strip quotes from the path
-                    file_path = file_path.strip('"').strip("'")
-
-                    # Always allow redirection to device files (/dev/null, etc.)
-                    if file_path.startswith("/dev/"):
-                        continue
-
-                    # Check if the file is within allowed directories
-                    is_allowed = any(
-                        file_path.startswith(allowed_dir)
-                        for allowed_dir in allowed_directories
-                    )
-
-                    if not is_allowed:
-                        return {
-                            'decision': 'block',
-                            'systemMessage': (
-                                f'Bash redirection denied: {file_path}\n'
-                                f'Can only redirect to: {", ".join(allowed_directories)}'
-                            )
-                        }
-
-            # Allow the bash command
-            return {}
-
-        # Allow all other tools (Grep, Glob, Task, Skill, WebSearch, etc.)
-        # These tools are either read-only or have their own safety measures
-        return {}
+        get = input_data.get
+        check = checks.get(get('tool_name', ''), allow)
+        return check(get('tool_input', _EMPTY_TOOL_INPUT))
 
     return HookMatcher(hooks=[pre_tool_use_hook])  # type: ignore[list-item]
 
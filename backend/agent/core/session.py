@@ -111,6 +111,12 @@ class ConversationSession:
             self._storage.save_session(session_id)
         self._session_shown = True
 
+    async def _get_response(self, prompt: str) -> AsyncIterator[Message]:
+        """Send a prompt and yield the response messages for one turn."""
+        await self.client.query(prompt)
+        async for msg in self.client.receive_response():
+            yield msg
+
     async def send_message(self, prompt: str) -> None:
         """Send a message programmatically (non-interactive mode).
 
@@ -136,13 +142,8 @@ class ConversationSession:
         # Send and process message
         await print_message("user", prompt)
 
-        async def get_response() -> AsyncIterator[Message]:
-            await self.client.query(prompt)
-            async for msg in self.client.receive_response():
-                yield msg
-
         await process_messages(
-            get_response(),
+            self._get_response(prompt),
             stream=self._include_partial_messages,
             on_session_id=None if self._session_shown else self._on_session_id
         )
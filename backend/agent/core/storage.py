@@ -1,7 +1,8 @@
 """Unified session storage for Claude Agent SDK.
 
 Provides a single storage system for both CLI and API modes.
-Sessions are stored in {DATA_DIR}/sessions.json with rich metadata.
+Sessions are stored in {DATA_DIR}/sessions.json with rich metadata: a JSON
+array snapshot followed by an append-only log of put/del records, one per line.
 Message history is stored in {DATA_DIR}/history/{session_id}.jsonl.
 
 Configure data directory via DATA_DIR environment variable.
@@ -13,14 +14,30 @@ Per-User Storage Support:
 
     These provide complete data isolation between users.
 """
+import atexit
 import json
 import logging
 import os
 import re
+import weakref
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import BinaryIO, Iterator, Literal
+
+# File locking is POSIX-only; without it compaction is unguarded
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# orjson is an optional speedup; fall back to the stdlib encoder without it
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on installed extras
+    orjson = None
 
 from agent import PROJECT_ROOT
 from core.settings import get_settings
@@ -35,6 +52,37 @@ MAX_SESSIONS = _settings.storage.max_sessions
 SESSIONS_FILENAME = _settings.storage.sessions_filename
 HISTORY_DIRNAME = _settings.storage.history_dirname
 
+# Rewrite the sessions file as a fresh snapshot once this many log records
+# have been appended after it
+COMPACT_THRESHOLD = 4 * MAX_SESSIONS
+
+# Buffer size of the per-session history append handles; each message is
+# flushed as one write
+HISTORY_WRITE_BUFFER = 64 * 1024
+
+# Read size used when scanning history files
+HISTORY_READ_CHUNK = 1024 * 1024
+
+# Indent the sessions snapshot for human inspection (debugging only)
+_PRETTY_SNAPSHOT = os.getenv("SESSIONS_PRETTY_JSON") == "1"
+
+# Force history to stable storage whenever it is flushed. Flushes happen
+# once per turn, so this costs one sync per turn rather than per message.
+_SYNC_HISTORY = os.getenv("HISTORY_FSYNC") == "1"
+_fdatasync = getattr(os, "fdatasync", os.fsync)  # fdatasync is Linux-only
+
+_json_decoder = json.JSONDecoder()
+
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes."""
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    _loads = json.loads
+
 
 def validate_username(username: str) -> str:
     """Validate username to prevent path traversal attacks.
@@ -70,9 +118,13 @@ def get_data_dir() -> Path:
     return PROJECT_ROOT / "data"
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionData:
-    """Data class for persisted session information."""
+    """Data class for persisted session information.
+
+    Read paths that only serialize sessions back out should use
+    SessionStorage.load_sessions_raw() and skip building these objects.
+    """
     session_id: str
     name: str | None = None  # Custom name for the session
     first_message: str | None = None
@@ -86,13 +138,32 @@ class SessionData:
             self.created_at = datetime.now().isoformat()
 
 
+def _stat_key(st: os.stat_result) -> tuple[int, int]:
+    """Cache stamp for a storage file: (mtime_ns, size)."""
+    return (st.st_mtime_ns, st.st_size)
+
+
 class SessionStorage:
     """Unified session storage for both CLI and API modes.
 
     Stores sessions in {data_dir}/sessions.json with rich metadata including
     session ID, first message, creation time, and turn count.
 
-    Uses in-memory caching to avoid repeated file reads when data hasn't changed.
+    The file holds a JSON array snapshot followed by one JSON record per line
+    ({"op": "put", "session": {...}} or {"op": "del", "session_id": ...}), so
+    each mutation appends a single line instead of rewriting every session.
+    The log is folded back into a snapshot once it exceeds COMPACT_THRESHOLD
+    records. Appends hold a shared flock on {data_dir}/sessions.json.lock and
+    compaction holds it exclusively and re-reads the file first, so several
+    instances (routers create one per request) never compact away each
+    other's records. A plain JSON array (the previous format) is a valid file with
+    an empty log; the reverse does not hold, so while the log is non-empty
+    the file cannot be read as plain JSON or by releases that predate it.
+
+    Uses in-memory caching to avoid repeated file reads when data hasn't changed,
+    and memoizes get_session_ids()/get_sessions_by_user() results until the
+    next change. The cache is stamped with the file's (mtime_ns, size), so writes made by
+    other instances or processes are picked up on the next read.
 
     Args:
         data_dir: Optional data directory path. Defaults to DATA_DIR env var or PROJECT_ROOT/data.
@@ -102,8 +173,18 @@ class SessionStorage:
         """Initialize session storage."""
         self._data_dir = data_dir or get_data_dir()
         self._sessions_file = self._data_dir / SESSIONS_FILENAME
+        self._lock_file = self._data_dir / f"{SESSIONS_FILENAME}.lock"
         self._cache: list[dict] | None = None
         self._cache_dirty: bool = True
+        self._cache_stat: tuple[int, int] | None = None
+        # Positions in _cache, rebuilt whenever sessions are added or removed
+        self._by_id: dict[str, int] = {}
+        self._by_user: dict[str | None, list[int]] = {}
+        # Memoized read-only query results, dropped on any change
+        self._projections: dict[tuple, list] = {}
+        self._log_records: int = 0
+        self._pending_records: list[bytes] = []
+        self._batch_depth: int = 0
         self._ensure_data_dir()
 
     def _ensure_data_dir(self) -> None:
@@ -119,20 +200,28 @@ class SessionStorage:
         Call this if the storage file may have been modified externally.
         """
         self._cache_dirty = True
+        self._projections.clear()
 
     def _read_storage(self) -> list[dict]:
         """Read sessions from storage file, using cache when available."""
-        if self._cache is not None and not self._cache_dirty:
+        try:
+            stat_key = _stat_key(os.stat(self._sessions_file))
+        except OSError:
+            stat_key = None
+
+        if (
+            self._cache is not None
+            and not self._cache_dirty
+            and stat_key == self._cache_stat
+        ):
             return self._cache
 
         try:
-            content = self._sessions_file.read_text().strip()
+            content = self._sessions_file.read_text(encoding="utf-8").strip()
             if not content:
                 logger.warning("Storage file empty, initializing")
                 return self._reset_storage()
-            self._cache = json.loads(content)
-            self._cache_dirty = False
-            return self._cache
+            snapshot, end = _json_decoder.raw_decode(content)
         except json.JSONDecodeError as e:
             logger.error(f"Corrupted storage file: {e}, reinitializing")
             return self._reset_storage()
@@ -140,30 +229,172 @@ class SessionStorage:
             logger.error(f"IO error reading storage file: {e}")
             return []
 
+        # Replay the log over the snapshot; updates keep their position
+        sessions = {s['session_id']: s for s in snapshot}
+        records = 0
+        for line in content[end:].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            records += 1
+            try:
+                record = _loads(line)
+                if record['op'] == 'put':
+                    session = record['session']
+                    session_id = session['session_id']
+                    # New sessions evict the oldest, as save_session does
+                    if session_id not in sessions and len(sessions) >= MAX_SESSIONS:
+                        del sessions[next(iter(sessions))]
+                    sessions[session_id] = session
+                else:
+                    sessions.pop(record['session_id'], None)
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping corrupted storage record: {e}")
+
+        self._cache = list(sessions.values())[-MAX_SESSIONS:]
+        self._cache_dirty = False
+        self._cache_stat = stat_key
+        self._log_records = records
+        self._reindex()
+        return self._cache
+
     def _reset_storage(self) -> list[dict]:
         """Reset storage file to empty state and return empty list."""
         self._sessions_file.write_text("[]")
         self._cache = []
         self._cache_dirty = False
-        return []
+        self._cache_stat = _stat_key(os.stat(self._sessions_file))
+        self._log_records = 0
+        self._reindex()
+        return self._cache
 
     def _write_storage(self, sessions: list[dict]) -> None:
-        """Write sessions to storage file and update cache."""
+        """Write sessions to storage file as a snapshot and update cache.
+
+        The snapshot is serialized up front, written with a single call to a
+        temporary file and renamed over the storage file, so readers never
+        observe a partially written snapshot.
+        """
+        if _PRETTY_SNAPSHOT:
+            payload = json.dumps(sessions, indent=2).encode()
+        else:
+            payload = _dumps(sessions)
+
+        tmp_file = self._sessions_file.with_name(f"{self._sessions_file.name}.tmp")
         try:
-            with open(self._sessions_file, "w") as f:
-                json.dump(sessions, f, indent=2)
+            with open(tmp_file, "wb") as f:
+                f.write(payload + b"\n")
+                f.flush()
+                cache_stat = _stat_key(os.fstat(f.fileno()))
+            os.replace(tmp_file, self._sessions_file)
+            self._cache_stat = cache_stat
             self._cache = sessions
             self._cache_dirty = False
+            self._log_records = 0
+            self._reindex()
         except IOError as e:
             logger.error(f"Error writing to storage file: {e}")
             self._cache_dirty = True
 
-    def _find_session_index(self, sessions: list[dict], session_id: str) -> int | None:
-        """Find index of session by ID, or None if not found."""
-        for i, session in enumerate(sessions):
-            if session['session_id'] == session_id:
-                return i
-        return None
+    @contextmanager
+    def _locked(self, exclusive: bool = False) -> Iterator[None]:
+        """Hold the storage lock: shared for appends, exclusive to compact."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_file, "ab") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # closing the file releases the lock
+
+    def _compact(self) -> None:
+        """Fold the log into a fresh snapshot.
+
+        The file is re-read under the exclusive lock, so records appended by
+        other instances since this one last read it end up in the snapshot.
+        """
+        with self._locked(exclusive=True):
+            sessions = self._read_storage()
+            # Another instance may have compacted while we waited
+            if self._log_records > COMPACT_THRESHOLD:
+                self._write_storage(sessions)
+
+    def _append_record(self, record: dict) -> None:
+        """Append a put/del record to the storage log, compacting if needed.
+
+        The in-memory cache must already reflect the change. Inside batch()
+        the record is held back and written together with the rest.
+        """
+        self._projections.clear()
+        self._pending_records.append(_dumps(record) + b"\n")
+        if self._batch_depth == 0:
+            self._flush_records()
+
+    def _flush_records(self) -> None:
+        """Write all pending log records in a single append."""
+        if not self._pending_records:
+            return
+        payload = b"".join(self._pending_records)
+        count = len(self._pending_records)
+        self._pending_records.clear()
+
+        try:
+            with self._locked(), open(self._sessions_file, "ab") as f:
+                # Anything appended since our last read means the cache
+                # missed a change, so only re-stamp it if we were current
+                in_sync = self._cache_stat is not None and f.tell() == self._cache_stat[1]
+                f.write(payload)
+                f.flush()
+                if in_sync:
+                    self._cache_stat = _stat_key(os.fstat(f.fileno()))
+                else:
+                    self._cache_dirty = True
+        except IOError as e:
+            logger.error(f"Error writing to storage file: {e}")
+            self._cache_dirty = True
+            return
+
+        self._log_records += count
+        if self._log_records > COMPACT_THRESHOLD:
+            self._compact()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group several mutations into one write.
+
+        Changes are applied to the in-memory cache immediately and written
+        to disk in a single append when the outermost batch exits. Batches
+        may be nested.
+
+        Example:
+            with storage.batch():
+                for session_id in session_ids:
+                    storage.delete_session(session_id)
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_records()
+
+    def _reindex(self) -> None:
+        """Rebuild the session ID and user ID indexes over the cache."""
+        self._projections.clear()
+        self._by_id = {}
+        self._by_user = {}
+        for i, session in enumerate(self._cache or ()):
+            self._by_id[session['session_id']] = i
+            self._by_user.setdefault(session.get('user_id'), []).append(i)
+
+    def _find_session_index(self, session_id: str) -> int | None:
+        """Find index of session by ID in the cache, or None if not found."""
+        return self._by_id.get(session_id)
+
+    def _user_sessions(self, user_id: str) -> list[dict]:
+        """Return the cached sessions owned by user_id, oldest first."""
+        sessions = self._read_storage()
+        return [sessions[i] for i in self._by_user.get(user_id, ())]
 
     def save_session(
         self,
@@ -182,7 +413,7 @@ class SessionStorage:
         """
         sessions = self._read_storage()
 
-        if self._find_session_index(sessions, session_id) is not None:
+        if self._find_session_index(session_id) is not None:
             logger.debug(f"Session already exists: {session_id}")
             return
 
@@ -193,15 +424,29 @@ class SessionStorage:
             user_id=user_id,
             agent_id=agent_id,
         )
-        sessions.append(asdict(session_data))
+        session = asdict(session_data)
+        sessions.append(session)
 
-        # Keep only last MAX_SESSIONS
+        # Keep only last MAX_SESSIONS; replaying the log trims the same way
         if len(sessions) > MAX_SESSIONS:
-            sessions = sessions[-MAX_SESSIONS:]
+            del sessions[:-MAX_SESSIONS]
+        self._reindex()
 
-        self._write_storage(sessions)
+        self._append_record({'op': 'put', 'session': session})
         logger.info(f"Saved session: {session_id} (user_id={user_id}, agent_id={agent_id})")
 
+    def load_sessions_raw(self) -> list[dict]:
+        """Load all sessions as stored dictionaries.
+
+        Cheaper than load_sessions() for callers that serialize the rows
+        directly. The dictionaries are the cached rows and must not be
+        mutated.
+
+        Returns:
+            List of session dictionaries (newest first)
+        """
+        return self._read_storage()[::-1]
+
     def load_sessions(self) -> list[SessionData]:
         """Load all sessions from storage.
 
@@ -221,9 +466,13 @@ class SessionStorage:
             List of session ID strings
         """
         sessions = self._read_storage()
-        if user_id:
-            sessions = [s for s in sessions if s.get('user_id') == user_id]
-        return [s['session_id'] for s in reversed(sessions)]
+        key = ('ids', user_id or None)
+        ids = self._projections.get(key)
+        if ids is None:
+            if user_id:
+                sessions = self._user_sessions(user_id)
+            ids = self._projections[key] = [s['session_id'] for s in reversed(sessions)]
+        return list(ids)
 
     def get_sessions_by_user(self, user_id: str) -> list[SessionData]:
         """Get all sessions for a specific user.
@@ -234,9 +483,13 @@ class SessionStorage:
         Returns:
             List of SessionData objects for the user (newest first)
         """
-        sessions = self._read_storage()
-        user_sessions = [s for s in sessions if s.get('user_id') == user_id]
-        return [SessionData(**session) for session in reversed(user_sessions)]
+        self._read_storage()
+        key = ('user', user_id)
+        rows = self._projections.get(key)
+        if rows is None:
+            rows = self._projections[key] = self._user_sessions(user_id)[::-1]
+        # Build fresh objects so callers never share (or mutate) cached state
+        return [SessionData(**session) for session in rows]
 
     def get_session(self, session_id: str) -> SessionData | None:
         """Get a specific session by ID.
@@ -248,7 +501,7 @@ class SessionStorage:
             SessionData if found, None otherwise
         """
         sessions = self._read_storage()
-        idx = self._find_session_index(sessions, session_id)
+        idx = self._find_session_index(session_id)
         if idx is not None:
             return SessionData(**sessions[idx])
         return None
@@ -286,7 +539,7 @@ class SessionStorage:
             True if session was found and updated, False otherwise
         """
         sessions = self._read_storage()
-        idx = self._find_session_index(sessions, session_id)
+        idx = self._find_session_index(session_id)
 
         if idx is None:
             logger.warning(f"Session not found for update: {session_id}")
@@ -302,7 +555,7 @@ class SessionStorage:
         if agent_id is not None:
             session['agent_id'] = agent_id
 
-        self._write_storage(sessions)
+        self._append_record({'op': 'put', 'session': session})
         logger.debug(f"Updated session: {session_id}")
         return True
 
@@ -316,16 +569,16 @@ class SessionStorage:
             True if session was found and deleted, False otherwise
         """
         sessions = self._read_storage()
-        initial_count = len(sessions)
-
-        sessions = [s for s in sessions if s['session_id'] != session_id]
+        idx = self._find_session_index(session_id)
 
-        if len(sessions) < initial_count:
-            self._write_storage(sessions)
-            logger.info(f"Deleted session: {session_id}")
-            return True
+        if idx is None:
+            return False
 
-        return False
+        del sessions[idx]
+        self._reindex()
+        self._append_record({'op': 'del', 'session_id': session_id})
+        logger.info(f"Deleted session: {session_id}")
+        return True
 
 
 @dataclass
@@ -345,12 +598,36 @@ class MessageData:
             self.timestamp = datetime.now().isoformat()
 
 
+# Characters stripped from session IDs in history file names. \w matches
+# exactly str.isalnum() plus "_", so "-_" and alphanumerics are kept.
+_UNSAFE_SESSION_ID_RE = re.compile(r'[^\w-]')
+
+
+@lru_cache(maxsize=1024)
+def _history_file_path(history_dir: str, session_id: str) -> str:
+    """Build the sanitized history file path for a session.
+
+    Plain strings keep the per-message open/stat calls free of Path objects.
+    """
+    safe_id = _UNSAFE_SESSION_ID_RE.sub('', session_id)
+    return os.path.join(history_dir, f"{safe_id}.jsonl")
+
+
 class HistoryStorage:
     """Local storage for conversation message history.
 
     Stores messages in JSONL format (one JSON object per line) for efficient
     append-only writes. Each session has its own file: {data_dir}/history/{session_id}.jsonl
 
+    Appends go through a handle kept open per session and each message is
+    flushed as a single write, so other instances (e.g. the REST history
+    endpoint) see it immediately. If the file is deleted through another
+    instance, the next append notices the unlinked handle and starts a new
+    file instead of writing into the deleted one.
+
+    Set HISTORY_FSYNC=1 to also fdatasync on every flush() and close(),
+    which group-commits a whole turn with a single sync.
+
     Args:
         data_dir: Optional data directory path. Defaults to DATA_DIR env var or PROJECT_ROOT/data.
     """
@@ -359,17 +636,19 @@ class HistoryStorage:
         """Initialize history storage."""
         self._data_dir = data_dir or get_data_dir()
         self._history_dir = self._data_dir / HISTORY_DIRNAME
+        self._history_dir_str = str(self._history_dir)
+        self._writers: dict[str, BinaryIO] = {}
         self._ensure_history_dir()
+        _open_history_storages.add(self)
 
     def _ensure_history_dir(self) -> None:
         """Create history directory if it doesn't exist."""
         self._history_dir.mkdir(parents=True, exist_ok=True)
         logger.debug(f"History directory ready: {self._history_dir}")
 
-    def _get_history_file(self, session_id: str) -> Path:
+    def _get_history_file(self, session_id: str) -> str:
         """Get the history file path for a session."""
-        safe_id = "".join(c for c in session_id if c.isalnum() or c in "-_")
-        return self._history_dir / f"{safe_id}.jsonl"
+        return _history_file_path(self._history_dir_str, session_id)
 
     def append_message(
         self,
@@ -404,51 +683,114 @@ class HistoryStorage:
             metadata=metadata or {}
         )
 
-        history_file = self._get_history_file(session_id)
         try:
-            with open(history_file, 'a') as f:
-                f.write(json.dumps(asdict(message)) + '\n')
+            writer = self._writers.get(session_id)
+            if writer is not None and os.fstat(writer.fileno()).st_nlink == 0:
+                # Deleted through another instance since our last append
+                self._writers.pop(session_id)
+                writer.close()
+                writer = None
+            if writer is None:
+                history_file = self._get_history_file(session_id)
+                writer = open(history_file, 'ab', buffering=HISTORY_WRITE_BUFFER)
+                self._writers[session_id] = writer
+            writer.write(_dumps(asdict(message)) + b'\n')
+            writer.flush()
             logger.debug(f"Appended {role} message to {session_id}")
         except IOError as e:
             logger.error(f"Error writing to history file: {e}")
 
-    def get_messages(self, session_id: str) -> list[MessageData]:
-        """Get all messages for a session.
+    def flush(self, session_id: str | None = None) -> None:
+        """Flush open history handles, syncing them when HISTORY_FSYNC is set.
+
+        Args:
+            session_id: Session to flush, or None to flush every open session.
+        """
+        if session_id is None:
+            writers = list(self._writers.values())
+        else:
+            writer = self._writers.get(session_id)
+            writers = [writer] if writer is not None else []
+
+        for writer in writers:
+            try:
+                writer.flush()
+                if _SYNC_HISTORY:
+                    _fdatasync(writer.fileno())
+            except IOError as e:
+                logger.error(f"Error flushing history file: {e}")
+
+    def close(self, session_id: str | None = None) -> None:
+        """Flush and close buffered history handles.
+
+        Args:
+            session_id: Session to close, or None to close every open session.
+        """
+        self.flush(session_id)
+        if session_id is None:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        else:
+            writer = self._writers.pop(session_id, None)
+            writers = [writer] if writer is not None else []
+
+        for writer in writers:
+            try:
+                writer.close()
+            except IOError as e:
+                logger.error(f"Error closing history file: {e}")
+
+    def iter_messages(self, session_id: str) -> Iterator[dict]:
+        """Iterate over the stored messages of a session, one line at a time.
+
+        Only the current message is held in memory, so long histories can be
+        processed or re-serialized without materializing the whole file.
 
         Args:
             session_id: Session ID
 
-        Returns:
-            List of MessageData objects in chronological order
+        Yields:
+            Message dictionaries in chronological order, as stored on disk
         """
+        self.flush(session_id)
         history_file = self._get_history_file(session_id)
-        messages = []
-
-        if not history_file.exists():
-            return messages
 
         try:
-            with open(history_file, 'r') as f:
+            with open(history_file, 'rb') as f:
                 for line in f:
                     line = line.strip()
                     if line:
-                        data = json.loads(line)
-                        messages.append(MessageData(**data))
+                        yield _loads(line)
+        except FileNotFoundError:
+            return
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
         except (IOError, json.JSONDecodeError) as e:
             logger.error(f"Error reading history file: {e}")
 
-        return messages
+    def get_messages(self, session_id: str) -> list[MessageData]:
+        """Get all messages for a session.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            List of MessageData objects in chronological order
+        """
+        return [MessageData(**data) for data in self.iter_messages(session_id)]
 
     def get_messages_dict(self, session_id: str) -> list[dict]:
         """Get all messages as dictionaries for JSON serialization.
 
+        Messages are stored as the dictionaries they serialize to, so this
+        skips the MessageData round trip.
+
         Args:
             session_id: Session ID
 
         Returns:
             List of message dictionaries
         """
-        return [asdict(msg) for msg in self.get_messages(session_id)]
+        return list(self.iter_messages(session_id))
 
     def delete_history(self, session_id: str) -> bool:
         """Delete the history file for a session.
@@ -459,15 +801,17 @@ class HistoryStorage:
         Returns:
             True if file was deleted, False if not found
         """
+        self.close(session_id)
         history_file = self._get_history_file(session_id)
-        if history_file.exists():
-            try:
-                history_file.unlink()
-                logger.info(f"Deleted history for session: {session_id}")
-                return True
-            except IOError as e:
-                logger.error(f"Error deleting history file: {e}")
-        return False
+        try:
+            os.unlink(history_file)
+        except FileNotFoundError:
+            return False
+        except IOError as e:
+            logger.error(f"Error deleting history file: {e}")
+            return False
+        logger.info(f"Deleted history for session: {session_id}")
+        return True
 
     def get_message_count(self, session_id: str) -> int:
         """Get the number of messages in a session history.
@@ -478,15 +822,32 @@ class HistoryStorage:
         Returns:
             Number of messages
         """
+        self.flush(session_id)
         history_file = self._get_history_file(session_id)
-        if not history_file.exists():
-            return 0
 
+        # Each message is exactly one line, so count newlines chunk by chunk
+        # instead of iterating lines; a trailing partial line still counts
+        count = 0
+        last = b'\n'
         try:
-            with open(history_file, 'r') as f:
-                return sum(1 for line in f if line.strip())
-        except IOError:
+            with open(history_file, 'rb') as f:
+                while chunk := f.read(HISTORY_READ_CHUNK):
+                    count += chunk.count(b'\n')
+                    last = chunk[-1:]
+        except IOError:  # includes a missing file
             return 0
+        return count if last == b'\n' else count + 1
+
+
+# Live HistoryStorage instances, flushed at interpreter exit
+_open_history_storages: "weakref.WeakSet[HistoryStorage]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_history_storages() -> None:
+    """Flush and close every open history handle on shutdown."""
+    for storage in list(_open_history_storages):
+        storage.close()
 
 
 def get_user_session_storage(username: str) -> SessionStorage:
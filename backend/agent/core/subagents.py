@@ -3,8 +3,15 @@
 
 Loads subagent definitions from subagents.yaml for delegation within conversations.
 Different from top-level agents (agents.yaml) - these are used via the Task tool.
+
+Loading is two-phase: load_subagent_index() returns lightweight metadata for
+every subagent, while load_subagent_definition() builds the full
+AgentDefinition for a single subagent on demand.
 """
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping
 
 from claude_agent_sdk import AgentDefinition
 
@@ -13,25 +20,68 @@ from agent.core.yaml_utils import load_yaml_config
 SUBAGENTS_CONFIG_PATH = Path(__file__).parent.parent.parent / "subagents.yaml"
 
 
-def load_subagents() -> dict[str, AgentDefinition]:
-    """Load subagents from subagents.yaml directly to AgentDefinition.
-
-    Returns:
-        Dictionary mapping subagent names to AgentDefinition instances.
-    """
+def _load_subagents_section() -> dict[str, dict[str, Any]]:
+    """Return the raw `subagents` section from subagents.yaml."""
     config = load_yaml_config(SUBAGENTS_CONFIG_PATH)
     if not config:
         return {}
+    return config.get("subagents", {})
+
+
+@lru_cache(maxsize=1)
+def load_subagent_index() -> Mapping[str, dict[str, str]]:
+    """Load lightweight metadata for all subagents.
+
+    Returns:
+        Read-only mapping of subagent names to their description and focus.
+    """
+    return MappingProxyType({
+        name: {
+            "description": sub.get("description", ""),
+            "focus": sub.get("focus", ""),
+        }
+        for name, sub in _load_subagents_section().items()
+    })
+
+
+@lru_cache(maxsize=None)
+def load_subagent_definition(name: str) -> AgentDefinition | None:
+    """Build the AgentDefinition for a single subagent.
+
+    Args:
+        name: Subagent name as defined in subagents.yaml.
+
+    Returns:
+        AgentDefinition instance, or None if the subagent is not defined.
+    """
+    sub = _load_subagents_section().get(name)
+    if sub is None:
+        return None
+
+    return AgentDefinition(
+        description=sub.get("description", ""),
+        prompt=sub.get("prompt", ""),
+        tools=sub.get("tools"),
+        model=sub.get("model", "sonnet"),
+    )
+
+
+@lru_cache(maxsize=1)
+def load_subagents() -> Mapping[str, AgentDefinition]:
+    """Load all subagents from subagents.yaml as AgentDefinition instances.
 
-    return {
-        name: AgentDefinition(
-            description=sub.get("description", ""),
-            prompt=sub.get("prompt", ""),
-            tools=sub.get("tools"),
-            model=sub.get("model", "sonnet"),
-        )
-        for name, sub in config.get("subagents", {}).items()
-    }
+    The result is built once per process and cached. It is returned as a
+    read-only mapping so callers cannot mutate the shared instance; copy it
+    with dict() if a mutable dict is needed. Prefer load_subagent_definition()
+    when only a subset of subagents is required.
+
+    Returns:
+        Read-only mapping of subagent names to AgentDefinition instances.
+    """
+    return MappingProxyType({
+        name: load_subagent_definition(name)
+        for name in load_subagent_index()
+    })
 
 
 def get_subagents_info() -> list[dict]:
@@ -40,11 +90,17 @@ def get_subagents_info() -> list[dict]:
     Returns:
         List of dictionaries with subagent name and focus description.
     """
-    config = load_yaml_config(SUBAGENTS_CONFIG_PATH)
-    if not config:
-        return []
-
     return [
-        {"name": name, "focus": sub.get("focus", "")}
-        for name, sub in config.get("subagents", {}).items()
+        {"name": name, "focus": meta["focus"]}
+        for name, meta in load_subagent_index().items()
     ]
+
+
+def clear_subagents_cache() -> None:
+    """Clear cached subagent metadata and definitions.
+
+    Call this if subagents.yaml has been modified and needs to be reloaded.
+    """
+    load_subagent_index.cache_clear()
+    load_subagent_definition.cache_clear()
+    load_subagents.cache_clear()
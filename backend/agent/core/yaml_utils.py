@@ -2,20 +2,99 @@
 
 Provides a centralized, cached YAML loading utility for configuration files.
 """
+import hashlib
+import logging
+import os
+import pickle
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+# Prefer the libyaml C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - depends on PyYAML build
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Skip the per-call mtime stat and cache purely by path. Intended for
+# production deployments where config files never change at runtime.
+_SKIP_MTIME_CHECK = os.getenv("AGENTS_YAML_CACHE") == "1"
+
+# Persist parsed configs as pickle sidecars ({name}.cache.{content-hash}) so
+# fresh processes skip YAML parsing. Sidecars are written next to the YAML
+# file unless AGENT_YAML_CACHE_DIR is set.
+#
+# Security: sidecars are loaded with pickle, which runs arbitrary code from a
+# crafted file. Only enable this when the sidecar directory (the config
+# directory by default) is writable by the service user alone; never point
+# AGENT_YAML_CACHE_DIR at a shared location such as /tmp.
+_FAST_CACHE_ENABLED = os.getenv("AGENT_YAML_FAST_CACHE") == "1"
+_FAST_CACHE_DIR = os.getenv("AGENT_YAML_CACHE_DIR")
+
+
+def _parse_yaml(config_path: Path) -> dict[str, Any]:
+    """Parse a YAML file, going through the pickle sidecar when enabled.
+
+    Sidecars are unpickled, so their directory must not be writable by
+    anyone other than the service user (see AGENT_YAML_FAST_CACHE above).
+    """
+    if not _FAST_CACHE_ENABLED:
+        with open(config_path) as f:
+            return yaml.load(f, Loader=_SafeLoader) or {}
+
+    raw = config_path.read_bytes()
+    digest = hashlib.blake2b(raw, digest_size=8).hexdigest()
+    cache_dir = Path(_FAST_CACHE_DIR) if _FAST_CACHE_DIR else config_path.parent
+    sidecar = cache_dir / f"{config_path.name}.cache.{digest}"
+
+    try:
+        with open(sidecar, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"Ignoring unreadable YAML cache {sidecar}: {e}")
+
+    data = yaml.load(raw, Loader=_SafeLoader) or {}
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Drop sidecars for previous versions of this file
+        for stale in cache_dir.glob(f"{config_path.name}.cache.*"):
+            stale.unlink(missing_ok=True)
+        tmp = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        logger.warning(f"Could not write YAML cache {sidecar}: {e}")
+
+    return data
+
 
 @lru_cache(maxsize=8)
+def _load_yaml_cached(config_path: Path, mtime_ns: int) -> dict[str, Any]:
+    """Parse a YAML file, cached by path and modification time.
+
+    The mtime is part of the cache key so that edits to the file on disk
+    produce a fresh parse on the next call.
+    """
+    return _parse_yaml(config_path)
+
+
 def load_yaml_config(config_path: Path) -> dict[str, Any]:
     """Load and cache YAML configuration.
 
-    Uses LRU cache to avoid repeated file reads for the same configuration.
-    The cache is based on the file path, so each unique config file is
-    cached separately.
+    The cache is keyed on the file path and its st_mtime_ns, so repeated
+    reads of an unchanged file are a dict lookup and modified files are
+    re-parsed automatically. Set AGENTS_YAML_CACHE=1 to skip the stat call
+    and cache by path only, and AGENT_YAML_FAST_CACHE=1 to share parsed
+    results across processes via content-hashed pickle sidecars (only when
+    the sidecar directory is writable by the service user alone).
 
     Args:
         config_path: Path to the YAML configuration file.
@@ -24,11 +103,17 @@ def load_yaml_config(config_path: Path) -> dict[str, Any]:
         Parsed YAML content as a dictionary, or empty dict if file doesn't exist
         or is empty.
     """
-    if not config_path.exists():
+    if _SKIP_MTIME_CHECK:
+        if not config_path.exists():
+            return {}
+        return _load_yaml_cached(config_path, 0)
+
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
         return {}
 
-    with open(config_path) as f:
-        return yaml.safe_load(f) or {}
+    return _load_yaml_cached(config_path, mtime_ns)
 
 
 def clear_yaml_cache() -> None:
@@ -36,4 +121,4 @@ def clear_yaml_cache() -> None:
 
     Call this if configuration files have been modified and need to be reloaded.
     """
-    load_yaml_config.cache_clear()
+    _load_yaml_cached.cache_clear()
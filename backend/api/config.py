@@ -2,6 +2,7 @@
 import logging
 import os
 from pathlib import Path
+from types import MappingProxyType
 
 from core.settings import get_settings
 
@@ -13,29 +14,41 @@ _settings = get_settings()
 # Centralized API key - used across all API modules
 API_KEY = os.getenv("API_KEY")
 
-# API server settings
-API_CONFIG = {
+# Allowed CORS origins, read once; unset or empty means wildcard. Trailing
+# slashes are dropped since browsers never send them in the Origin header.
+_cors_origins = tuple(
+    origin
+    for origin in (o.strip().rstrip("/") for o in os.getenv("CORS_ORIGINS", "").split(","))
+    if origin
+) or ("*",)
+_cors_is_wildcard = "*" in _cors_origins
+
+# Set form of the allowed origins for O(1) membership checks per request
+CORS_ORIGINS_SET = frozenset(_cors_origins)
+
+# API server settings (read-only; environment is read once at import)
+API_CONFIG = MappingProxyType({
     "host": os.getenv("API_HOST", _settings.api.host),
     "port": int(os.getenv("API_PORT", str(_settings.api.port))),
     "reload": os.getenv("API_RELOAD", "false").lower() == "true",
     "log_level": os.getenv("API_LOG_LEVEL", _settings.api.log_level),
-    "cors_origins": os.getenv("CORS_ORIGINS", "*").split(",") if os.getenv("CORS_ORIGINS") else ["*"],
+    "cors_origins": _cors_origins,
     "api_key": API_KEY,  # Optional API key for authentication
-}
+})
 
 # Log warning if wildcard CORS is used
-if "*" in API_CONFIG["cors_origins"]:
+if _cors_is_wildcard:
     logger.warning("WARNING: CORS configured with wildcard origin (*). Set CORS_ORIGINS for production.")
 
-# JWT configuration
-JWT_CONFIG = {
+# JWT configuration (read-only)
+JWT_CONFIG = MappingProxyType({
     "secret_key": _settings.jwt.secret,
     "algorithm": _settings.jwt.algorithm,
     "access_token_expire_minutes": int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")),
     "refresh_token_expire_days": int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7")),
     "issuer": _settings.jwt.issuer,
     "audience": _settings.jwt.audience,
-}
+})
 
 # Log JWT status
 logger.info("JWT authentication enabled (using JWT_SECRET)")
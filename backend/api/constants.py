@@ -1,15 +1,26 @@
 """Centralized constants for API communication."""
 
 from enum import IntEnum, StrEnum
+from typing import Final
+
+# Plain str event types for the streaming hot path. Enum attribute access and
+# serializing StrEnum members are slower than using a bare str, and these are
+# emitted once per streamed chunk. EventType below is built from the same
+# values so the two cannot drift apart.
+SESSION_ID: Final = "session_id"
+TEXT_DELTA: Final = "text_delta"
+TOOL_USE: Final = "tool_use"
+TOOL_RESULT: Final = "tool_result"
+DONE: Final = "done"
 
 
 class EventType(StrEnum):
     """Event types for SSE and WebSocket communication."""
-    SESSION_ID = "session_id"
-    TEXT_DELTA = "text_delta"
-    TOOL_USE = "tool_use"
-    TOOL_RESULT = "tool_result"
-    DONE = "done"
+    SESSION_ID = SESSION_ID
+    TEXT_DELTA = TEXT_DELTA
+    TOOL_USE = TOOL_USE
+    TOOL_RESULT = TOOL_RESULT
+    DONE = DONE
     ERROR = "error"
     READY = "ready"
     ASK_USER_QUESTION = "ask_user_question"
@@ -52,6 +63,14 @@ class WSCloseCode(IntEnum):
     SESSION_NOT_FOUND = 4004
 
 
+# Pre-encoded SSE frame pieces, matching sse-starlette's default "\r\n"
+# separator. A frame is SSE_FRAME_PREFIX[event] + data + SSE_FRAME_SUFFIX,
+# which is only valid when data holds no line breaks (e.g. json.dumps output).
+SSE_FRAME_PREFIX: Final[dict[str, bytes]] = {
+    event.value: f"event: {event.value}\r\ndata: ".encode() for event in EventType
+}
+SSE_FRAME_SUFFIX: Final = b"\r\n\r\n"
+
 # Configuration defaults
 ASK_USER_QUESTION_TIMEOUT = 60  # seconds
 FIRST_MESSAGE_TRUNCATE_LENGTH = 100
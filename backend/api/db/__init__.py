@@ -2,6 +2,7 @@
 
 from .user_database import (
     DbUser,
+    authenticate,
     init_database,
     get_user_by_username,
     verify_password,
@@ -11,6 +12,7 @@ from .user_database import (
 
 __all__ = [
     "DbUser",
+    "authenticate",
     "init_database",
     "get_user_by_username",
     "verify_password",
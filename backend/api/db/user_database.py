@@ -4,13 +4,18 @@ Provides user storage and authentication functionality using SQLite.
 Uses bcrypt for secure password hashing.
 """
 
+import hashlib
 import logging
 import os
 import sqlite3
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Generator, Optional
 
@@ -28,7 +33,7 @@ _settings = get_settings()
 DATABASE_FILENAME = _settings.storage.database_filename
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DbUser:
     """Data class representing a user in the database."""
     id: str
@@ -41,26 +46,77 @@ class DbUser:
     is_active: bool
 
 
+# SQL statements, kept as module constants so the pooled connection's
+# statement cache reuses their compiled form across calls
+_SQL_SELECT_USER_ID = "SELECT id FROM users WHERE username = ?"
+_SQL_GET_USER = (
+    "SELECT id, username, password_hash, full_name, role, created_at, last_login, is_active "
+    "FROM users WHERE username = ?"
+)
+_SQL_INSERT_USER = (
+    "INSERT INTO users (id, username, password_hash, full_name, role, created_at, is_active) "
+    "VALUES (?, ?, ?, ?, ?, ?, 1)"
+)
+_SQL_UPDATE_LOGIN = "UPDATE users SET last_login = ? WHERE id = ?"
+SQL_STATEMENT_CACHE_SIZE = 256
+
+# Short-lived cache of bcrypt results so repeated logins skip the hash.
+# Keyed by the stored hash plus a SHA-256 of the candidate password, so a
+# password change invalidates entries and plaintext is never retained.
+VERIFY_CACHE_MAX_SIZE = 1024
+VERIFY_CACHE_TTL_SECONDS = 5.0
+_verify_cache: OrderedDict[tuple[str, bytes], tuple[float, bool]] = OrderedDict()
+_verify_cache_lock = threading.Lock()
+
+# Per-thread pooled connection, stored as (db_path, connection)
+_local = threading.local()
+
+
+@lru_cache(maxsize=8)
+def _ensure_data_dir(data_dir: Path) -> None:
+    """Create the data directory once per distinct path."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+
 def _get_database_path() -> Path:
     """Get the path to the SQLite database file."""
     data_dir = get_data_dir()
-    data_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_data_dir(data_dir)
     return data_dir / DATABASE_FILENAME
 
 
 def _get_connection() -> sqlite3.Connection:
-    """Get a database connection with row factory configured."""
+    """Open a new database connection with row factory configured.
+
+    Connections run in autocommit mode with WAL journaling so that pooled
+    connections never hold a transaction open between calls and readers on
+    the auth path do not block on writers.
+    """
     db_path = _get_database_path()
-    conn = sqlite3.connect(str(db_path))
+    conn = sqlite3.connect(
+        str(db_path), isolation_level=None, cached_statements=SQL_STATEMENT_CACHE_SIZE
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
 
 
+def close_db_connection() -> None:
+    """Close the calling thread's pooled database connection, if any."""
+    pooled = getattr(_local, "pooled", None)
+    _local.pooled = None
+    if pooled is not None:
+        pooled[1].close()
+
+
 @contextmanager
 def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
     """Context manager for database connections.
 
-    Ensures proper connection cleanup even when exceptions occur.
+    Yields a connection pooled per thread and per database path, so repeated
+    lookups skip reopening the SQLite file. The connection stays open after
+    the block; any transaction left open by an exception is rolled back.
 
     Yields:
         sqlite3.Connection: Database connection with row factory configured
@@ -70,11 +126,37 @@ def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM users")
     """
-    conn = _get_connection()
+    db_path = _get_database_path()
+    pooled = getattr(_local, "pooled", None)
+    if pooled is None or pooled[0] != db_path:
+        close_db_connection()
+        pooled = _local.pooled = (db_path, _get_connection())
+    conn = pooled[1]
     try:
         yield conn
-    finally:
-        conn.close()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+# (epoch second, ISO string) for the most recent _iso_now() call
+_last_timestamp: tuple[int, str] = (0, "")
+
+
+def _iso_now() -> str:
+    """Return the current local time as a second-resolution ISO string.
+
+    The formatted string is reused for every call within the same second.
+    """
+    global _last_timestamp
+    now = int(time.time())
+    cached = _last_timestamp
+    if cached[0] == now:
+        return cached[1]
+    iso = datetime.fromtimestamp(now).isoformat()
+    _last_timestamp = (now, iso)
+    return iso
 
 
 def hash_password(password: str) -> str:
@@ -107,10 +189,50 @@ def _verify_password_hash(password: str, password_hash: str) -> bool:
             password_hash.encode("utf-8")
         )
     except (ValueError, TypeError) as e:
-        logger.error(f"Password verification error: {e}")
+        logger.error("Password verification error: %s", e)
         return False
 
 
+def _verify_password_hash_cached(password: str, password_hash: str) -> bool:
+    """Verify a password against its hash, reusing recent results.
+
+    Both matches and mismatches are cached for VERIFY_CACHE_TTL_SECONDS.
+
+    Args:
+        password: Plain text password to verify
+        password_hash: Bcrypt hashed password
+
+    Returns:
+        True if password matches, False otherwise
+    """
+    # The stored hash is part of the key, so changing a password (which
+    # stores a new hash) stops old entries matching without explicit
+    # invalidation
+    key = (password_hash, hashlib.sha256(password.encode("utf-8")).digest())
+    now = time.monotonic()
+
+    with _verify_cache_lock:
+        entry = _verify_cache.get(key)
+        if entry is not None and now - entry[0] < VERIFY_CACHE_TTL_SECONDS:
+            return entry[1]
+
+    result = _verify_password_hash(password, password_hash)
+
+    with _verify_cache_lock:
+        _verify_cache[key] = (now, result)
+        _verify_cache.move_to_end(key)
+        while len(_verify_cache) > VERIFY_CACHE_MAX_SIZE:
+            _verify_cache.popitem(last=False)
+
+    return result
+
+
+def clear_verify_cache() -> None:
+    """Drop all cached password verification results."""
+    with _verify_cache_lock:
+        _verify_cache.clear()
+
+
 def init_database() -> None:
     """Initialize the database schema and create default users if they don't exist.
 
@@ -118,7 +240,7 @@ def init_database() -> None:
     if they are not already present.
     """
     db_path = _get_database_path()
-    logger.info(f"Initializing user database at: {db_path}")
+    logger.info("Initializing user database at: %s", db_path)
 
     try:
         with get_db_connection() as conn:
@@ -150,7 +272,7 @@ def init_database() -> None:
             _create_default_users(conn)
 
     except sqlite3.Error as e:
-        logger.error(f"Database initialization error: {e}")
+        logger.error("Database initialization error: %s", e)
         raise
 
 
@@ -200,23 +322,18 @@ def _create_default_users(conn: sqlite3.Connection) -> None:
         )
         return
 
+    created_at = _iso_now()
+
     for user_data in default_users:
         # Check if user already exists
-        cursor.execute(
-            "SELECT id FROM users WHERE username = ?",
-            (user_data["username"],)
-        )
+        cursor.execute(_SQL_SELECT_USER_ID, (user_data["username"],))
 
         if cursor.fetchone() is None:
             # User doesn't exist, create them
             user_id = str(uuid.uuid4())
             password_hash = hash_password(user_data["password"])
-            created_at = datetime.now().isoformat()
 
-            cursor.execute("""
-                INSERT INTO users (id, username, password_hash, full_name, role, created_at, is_active)
-                VALUES (?, ?, ?, ?, ?, ?, 1)
-            """, (
+            cursor.execute(_SQL_INSERT_USER, (
                 user_id,
                 user_data["username"],
                 password_hash,
@@ -225,11 +342,20 @@ def _create_default_users(conn: sqlite3.Connection) -> None:
                 created_at
             ))
 
-            logger.info(f"Created default user: {user_data['username']} (role: {user_data['role']})")
+            logger.info("Created default user: %s (role: %s)", user_data["username"], user_data["role"])
 
     conn.commit()
 
 
+def _row_to_user(row: sqlite3.Row) -> DbUser:
+    """Build a DbUser from a _SQL_GET_USER row.
+
+    The query selects columns in DbUser field order, so the row is passed
+    positionally.
+    """
+    return DbUser(*row[:7], bool(row[7]))
+
+
 def get_user_by_username(username: str) -> Optional[DbUser]:
     """Get a user by their username.
 
@@ -243,31 +369,18 @@ def get_user_by_username(username: str) -> Optional[DbUser]:
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT id, username, password_hash, full_name, role, created_at, last_login, is_active
-                FROM users
-                WHERE username = ?
-            """, (username,))
+            cursor.execute(_SQL_GET_USER, (username,))
 
             row = cursor.fetchone()
 
             if row is None:
-                logger.debug(f"User not found: {username}")
+                logger.debug("User not found: %s", username)
                 return None
 
-            return DbUser(
-                id=row["id"],
-                username=row["username"],
-                password_hash=row["password_hash"],
-                full_name=row["full_name"],
-                role=row["role"],
-                created_at=row["created_at"],
-                last_login=row["last_login"],
-                is_active=bool(row["is_active"])
-            )
+            return _row_to_user(row)
 
     except sqlite3.Error as e:
-        logger.error(f"Database error getting user {username}: {e}")
+        logger.error("Database error getting user %s: %s", username, e)
         return None
 
 
@@ -284,18 +397,18 @@ def verify_password(username: str, password: str) -> bool:
     user = get_user_by_username(username)
 
     if user is None:
-        logger.warning(f"Password verification failed: user not found - {username}")
+        logger.warning("Password verification failed: user not found - %s", username)
         return False
 
     if not user.is_active:
-        logger.warning(f"Password verification failed: user inactive - {username}")
+        logger.warning("Password verification failed: user inactive - %s", username)
         return False
 
-    if _verify_password_hash(password, user.password_hash):
-        logger.debug(f"Password verified successfully for user: {username}")
+    if _verify_password_hash_cached(password, user.password_hash):
+        logger.debug("Password verified successfully for user: %s", username)
         return True
 
-    logger.warning(f"Password verification failed: incorrect password - {username}")
+    logger.warning("Password verification failed: incorrect password - %s", username)
     return False
 
 
@@ -309,20 +422,57 @@ def update_last_login(user_id: str) -> None:
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            last_login = datetime.now().isoformat()
+            last_login = _iso_now()
 
-            cursor.execute("""
-                UPDATE users
-                SET last_login = ?
-                WHERE id = ?
-            """, (last_login, user_id))
+            cursor.execute(_SQL_UPDATE_LOGIN, (last_login, user_id))
 
             conn.commit()
 
             if cursor.rowcount > 0:
-                logger.debug(f"Updated last login for user: {user_id}")
+                logger.debug("Updated last login for user: %s", user_id)
             else:
-                logger.warning(f"No user found to update last login: {user_id}")
+                logger.warning("No user found to update last login: %s", user_id)
+
+    except sqlite3.Error as e:
+        logger.error("Database error updating last login for %s: %s", user_id, e)
+
+
+def authenticate(username: str, password: str) -> Optional[DbUser]:
+    """Verify credentials and record the login in one connection scope.
+
+    Combines get_user_by_username, verify_password and update_last_login
+    so a successful login costs one lookup and one update.
+
+    Args:
+        username: The username to authenticate
+        password: The plain text password to check
+
+    Returns:
+        The authenticated DbUser with last_login updated, or None if the
+        user does not exist, is inactive, or the password is incorrect
+    """
+    try:
+        with get_db_connection() as conn:
+            row = conn.execute(_SQL_GET_USER, (username,)).fetchone()
+
+            if row is None:
+                logger.warning("Authentication failed: user not found - %s", username)
+                return None
+
+            user = _row_to_user(row)
+
+            if not user.is_active:
+                logger.warning("Authentication failed: user inactive - %s", username)
+                return None
+
+            if not _verify_password_hash_cached(password, user.password_hash):
+                logger.warning("Authentication failed: incorrect password - %s", username)
+                return None
+
+            last_login = _iso_now()
+            conn.execute(_SQL_UPDATE_LOGIN, (last_login, user.id))
+            return replace(user, last_login=last_login)
 
     except sqlite3.Error as e:
-        logger.error(f"Database error updating last login for {user_id}: {e}")
+        logger.error("Database error authenticating user %s: %s", username, e)
+        return None
@@ -12,6 +12,28 @@ from api.services.token_service import token_service
 logger = logging.getLogger(__name__)
 
 
+def _user_from_state(request: Request) -> UserTokenPayload | None:
+    """Return the authenticated user stored on the request, if any.
+
+    Prefers the payload pre-built by APIKeyMiddleware and falls back to
+    building one from the request.state.user context dict.
+    """
+    state = request.state
+    payload = getattr(state, 'user_payload', None)
+    if isinstance(payload, UserTokenPayload):
+        return payload
+
+    user_context = getattr(state, 'user', None)
+    if not user_context:
+        return None
+
+    return UserTokenPayload(
+        user_id=user_context.get("user_id", ""),
+        username=user_context.get("username", ""),
+        role=user_context.get("role", "user"),
+    )
+
+
 async def get_current_user(request: Request) -> UserTokenPayload:
     """Get current authenticated user from request state.
 
@@ -24,19 +46,15 @@ async def get_current_user(request: Request) -> UserTokenPayload:
     Raises:
         HTTPException: 401 if user is not authenticated
     """
-    user_context = getattr(request.state, 'user', None)
+    user = _user_from_state(request)
 
-    if not user_context:
+    if user is None:
         raise HTTPException(
             status_code=401,
             detail="User authentication required. Please login first."
         )
 
-    return UserTokenPayload(
-        user_id=user_context.get("user_id", ""),
-        username=user_context.get("username", ""),
-        role=user_context.get("role", "user"),
-    )
+    return user
 
 
 async def get_current_user_optional(request: Request) -> UserTokenPayload | None:
@@ -44,16 +62,7 @@ async def get_current_user_optional(request: Request) -> UserTokenPayload | None
 
     Use this for endpoints that work differently for authenticated vs anonymous users.
     """
-    user_context = getattr(request.state, 'user', None)
-
-    if not user_context:
-        return None
-
-    return UserTokenPayload(
-        user_id=user_context.get("user_id", ""),
-        username=user_context.get("username", ""),
-        role=user_context.get("role", "user"),
-    )
+    return _user_from_state(request)
 
 
 async def get_current_user_ws(token: str) -> UserTokenPayload:
@@ -1,29 +1,87 @@
 """FastAPI application factory for Agent SDK API."""
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import uvicorn
 
-from api.config import API_CONFIG
+from api.config import API_CONFIG, CORS_ORIGINS_SET
 from api.core.errors import SessionNotFoundError, APIError
 from api.routers import health, sessions, conversations, configuration, websocket, auth, user_auth
+from api.routers.health import SERVICE_NAME, HealthResponse
 from api.middleware.auth import APIKeyMiddleware
 from api.db.user_database import init_database
 
+logger = logging.getLogger(__name__)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers to all responses."""
 
-    async def dispatch(self, request: Request, call_next):
-        """Process request and add security headers to response."""
-        response = await call_next(request)
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        return response
+# Static security headers, shared with the /health fast path
+SECURITY_HEADERS = (
+    ("X-Frame-Options", "DENY"),
+    ("X-Content-Type-Options", "nosniff"),
+    ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+)
+
+
+class SecurityHeadersMiddleware:
+    """Middleware to add security headers to all responses.
+
+    Implemented as pure ASGI: the headers are set on the outgoing
+    http.response.start message, so no Request/Response objects are built.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS:
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class HealthCheckMiddleware:
+    """Answer GET /health before the rest of the middleware stack runs.
+
+    Load balancers poll /health every few seconds; serving it from pre-built
+    bytes skips CORS, GZip, security-header and API key handling entirely.
+    The /health route stays registered for the OpenAPI schema and for any
+    other method.
+    """
+
+    _body = HealthResponse(status="ok", service=SERVICE_NAME).model_dump_json().encode()
+    _start = {
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(_body)).encode()),
+            *((name.lower().encode(), value.encode()) for name, value in SECURITY_HEADERS),
+        ],
+    }
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] == "/health" and scope["method"] == "GET":
+            await send(self._start)
+            await send({"type": "http.response.body", "body": self._body})
+            return
+        await self.app(scope, receive, send)
 
 
 @asynccontextmanager
@@ -36,8 +94,17 @@ async def lifespan(app: FastAPI):
     # Shutdown - cleanup all background workers
     from api.services.session_manager import get_session_manager
     manager = get_session_manager()
-    for session in manager._sessions.values():
-        await session.shutdown()
+    sessions = list(manager._sessions.items())
+    # Disconnect concurrently so shutdown time does not grow with session count
+    results = await asyncio.gather(
+        *(session.shutdown() for _, session in sessions),
+        return_exceptions=True,
+    )
+    for (session_id, _), result in zip(sessions, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to shut down session {session_id}: {result}")
+    if sessions:
+        logger.info(f"Shut down {len(sessions)} session(s)")
 
 
 def create_app() -> FastAPI:
@@ -56,10 +123,10 @@ def create_app() -> FastAPI:
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=API_CONFIG["cors_origins"],
+        allow_origins=CORS_ORIGINS_SET,
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*", "X-API-Key"],
+        allow_methods=("*",),
+        allow_headers=("*", "X-API-Key"),
     )
 
     # Add GZip compression middleware
@@ -70,6 +137,9 @@ def create_app() -> FastAPI:
 
     # Add API key authentication middleware (after CORS)
     app.add_middleware(APIKeyMiddleware)
+
+    # Serve load balancer health checks ahead of every other middleware
+    app.add_middleware(HealthCheckMiddleware)
     
     # Include routers
     app.include_router(health.router, tags=["health"])
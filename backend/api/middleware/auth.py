@@ -9,14 +9,15 @@ Security considerations:
 - Failed authentication attempts are logged with client IP and path for security
   monitoring and incident response, but the provided key is NEVER logged.
 """
+import json
 import logging
 import secrets
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from pydantic import ValidationError
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from api.config import API_KEY
+from api.models.user_auth import UserTokenPayload
 from api.services.token_service import token_service
 from core.settings import get_settings
 
@@ -25,51 +26,88 @@ logger = logging.getLogger(__name__)
 # Get centralized settings
 _settings = get_settings()
 
-
-class APIKeyMiddleware(BaseHTTPMiddleware):
+# Paths that skip authentication (health check, root path for load balancers,
+# auth endpoints); settings are fixed for the life of the process
+PUBLIC_PATHS: frozenset[str] = frozenset(_settings.api.public_paths)
+
+# Configured key as bytes, compared directly against the raw header value
+_API_KEY_BYTES: bytes | None = API_KEY.encode("utf-8") if API_KEY else None
+
+# Rejections always carry the same body, so the 401 is serialized once
+_UNAUTHORIZED_BODY = json.dumps(
+    {"detail": "Invalid or missing API key"}, separators=(",", ":")
+).encode("utf-8")
+_UNAUTHORIZED_START = {
+    "type": "http.response.start",
+    "status": 401,
+    "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(_UNAUTHORIZED_BODY)).encode()),
+    ],
+}
+_UNAUTHORIZED_BODY_MESSAGE = {"type": "http.response.body", "body": _UNAUTHORIZED_BODY}
+
+
+class APIKeyMiddleware:
     """Middleware to validate API key for protected endpoints.
 
     This middleware enforces API key authentication on all endpoints except
     health checks and CORS preflight requests. Keys must be provided via
     the X-API-Key header for security reasons.
+
+    Implemented as pure ASGI middleware: it reads the path, method and
+    headers straight from the scope instead of wrapping each request in
+    BaseHTTPMiddleware's extra task and response stream.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        """Process request and validate API key.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        Args:
-            request: The incoming request
-            call_next: The next middleware/handler in the chain
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Validate the API key for HTTP requests and pass them on.
 
-        Returns:
-            Response from the next handler if authorized, or 401 JSONResponse if unauthorized
+        Args:
+            scope: The ASGI connection scope
+            receive: The ASGI receive channel
+            send: The ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Skip auth for health check, root path (load balancer), auth endpoints, and OPTIONS (CORS preflight)
-        public_paths = set(_settings.api.public_paths)
-        if request.url.path in public_paths or request.method == "OPTIONS":
-            return await call_next(request)
+        path = scope["path"]
+        if path in PUBLIC_PATHS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
 
-        if not API_KEY:
-            return await call_next(request)  # No key configured = no auth
+        if _API_KEY_BYTES is None:
+            await self.app(scope, receive, send)  # No key configured = no auth
+            return
 
         # Only accept API key from header - NEVER from query params
         # Query strings are logged in server logs, browser history, and proxies
-        provided_key = request.headers.get("X-API-Key")
+        provided_key = None
+        user_token = None
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                if provided_key is None:
+                    provided_key = value
+            elif name == b"x-user-token":
+                if user_token is None:
+                    user_token = value.decode("latin-1")
 
         # Use timing-safe comparison to prevent timing attacks
-        if not provided_key or not secrets.compare_digest(provided_key, API_KEY):
+        if not provided_key or not secrets.compare_digest(provided_key, _API_KEY_BYTES):
             # Log auth failure with client info but NEVER log the actual key
-            client_ip = request.client.host if request.client else "unknown"
-            logger.warning(f"Authentication failed: client_ip={client_ip} path={request.url.path}")
-            # Cannot raise HTTPException in middleware - must return Response directly
-            return JSONResponse(
-                status_code=401,
-                content={"detail": "Invalid or missing API key"}
-            )
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
+            logger.warning(f"Authentication failed: client_ip={client_ip} path={path}")
+            await send(_UNAUTHORIZED_START)
+            await send(_UNAUTHORIZED_BODY_MESSAGE)
+            return
 
         # Extract user identity from X-User-Token header (optional)
-        user_token = request.headers.get("X-User-Token")
-
         if user_token and token_service:
             try:
                 # Decode token without type restriction - just verify signature and claims
@@ -77,14 +115,25 @@ class APIKeyMiddleware(BaseHTTPMiddleware):
 
                 if payload and payload.get("username"):
                     # Store user context in request state
-                    request.state.user = {
+                    user_context = {
                         "user_id": payload.get("user_id", payload.get("sub")),
                         "username": payload.get("username", ""),
                         "role": payload.get("role", "user"),
                         "full_name": payload.get("full_name", ""),
                     }
+                    state = scope.setdefault("state", {})
+                    state["user"] = user_context
+                    # Build the dependency payload once per request
+                    try:
+                        state["user_payload"] = UserTokenPayload(
+                            user_id=user_context["user_id"],
+                            username=user_context["username"],
+                            role=user_context["role"],
+                        )
+                    except ValidationError:
+                        pass
             except Exception as e:
                 # User token is optional, don't fail the request
                 logger.debug(f"Failed to decode user token: {e}")
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
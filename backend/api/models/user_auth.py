@@ -1,7 +1,7 @@
 """
 User authentication models for login and user identity management.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Literal
 
 
@@ -29,7 +29,12 @@ class LoginResponse(BaseModel):
 
 
 class UserTokenPayload(BaseModel):
-    """Payload for user identity token (extracted from JWT)."""
+    """Payload for user identity token (extracted from JWT).
+
+    Frozen so a single instance can be shared for the whole request.
+    """
+    model_config = ConfigDict(frozen=True)
+
     user_id: str
     username: str
     role: Literal['admin', 'user']
@@ -2,7 +2,7 @@
 import json
 import logging
 import uuid
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
 from fastapi import APIRouter, Depends
 from sse_starlette.sse import EventSourceResponse
@@ -11,7 +11,7 @@ from api.models.requests import SendMessageRequest, CreateConversationRequest
 from api.dependencies import SessionManagerDep
 from api.dependencies.auth import get_current_user
 from api.models.user_auth import UserTokenPayload
-from api.constants import EventType
+from api.constants import SSE_FRAME_PREFIX, SSE_FRAME_SUFFIX, EventType
 from api.services.message_utils import convert_messages_to_sse
 from api.services.history_tracker import HistoryTracker
 from agent.core.storage import get_user_history_storage
@@ -21,6 +21,28 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
 
+async def _encode_sse_frames(events: AsyncIterator[dict]) -> AsyncIterator[Any]:
+    """Encode known SSE event dicts into wire frames from pre-built prefixes.
+
+    Skips sse-starlette's per-event ServerSentEvent construction for the
+    high-volume event types. Events with other names, or data that is not a
+    single-line string, are passed through for sse-starlette to encode.
+    """
+    async for event in events:
+        prefix = SSE_FRAME_PREFIX.get(event.get("event"))
+        data = event.get("data")
+        if (
+            prefix is not None
+            and len(event) == 2
+            and isinstance(data, str)
+            and "\n" not in data
+            and "\r" not in data
+        ):
+            yield prefix + data.encode() + SSE_FRAME_SUFFIX
+        else:
+            yield event
+
+
 @router.post("")
 async def create_conversation(
     request: CreateConversationRequest,
@@ -53,7 +75,9 @@ async def create_conversation(
     session_id = request.session_id or str(uuid.uuid4())
 
     return EventSourceResponse(
-        _stream_conversation_events(session_id, request.content, manager, request.agent_id, user.username),
+        _encode_sse_frames(_stream_conversation_events(
+            session_id, request.content, manager, request.agent_id, user.username
+        )),
         media_type="text/event-stream"
     )
 
@@ -174,6 +198,8 @@ async def stream_conversation(
         - event: done
     """
     return EventSourceResponse(
-        _stream_conversation_events(session_id, request.content, manager, username=user.username),
+        _encode_sse_frames(_stream_conversation_events(
+            session_id, request.content, manager, username=user.username
+        )),
         media_type="text/event-stream"
     )
@@ -2,6 +2,9 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+# Service name reported by the /health endpoint
+SERVICE_NAME = "agent-sdk-api"
+
 
 class HealthResponse(BaseModel):
     """Response model for health check endpoints.
@@ -35,4 +38,4 @@ async def health_check() -> HealthResponse:
     Returns:
         HealthResponse with status "ok" and service name.
     """
-    return HealthResponse(status="ok", service="agent-sdk-api")
+    return HealthResponse(status="ok", service=SERVICE_NAME)
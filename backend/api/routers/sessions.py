@@ -4,6 +4,8 @@ Provides REST API for creating, closing, deleting, and listing sessions.
 Integrates with SessionManager service for business logic.
 Uses per-user storage for data isolation between authenticated users.
 """
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, status
 
 from agent.core.storage import get_user_history_storage, get_user_session_storage
@@ -149,18 +151,20 @@ async def batch_delete_sessions(
     session_storage = get_user_session_storage(user.username)
     history_storage = get_user_history_storage(user.username)
 
-    for session_id in request.session_ids:
-        # Try to delete from manager (in-memory cache)
-        try:
-            await manager.delete_session(session_id)
-        except Exception as e:
-            # Session not in cache, but might still exist in storage
-            # This is expected for sessions loaded from disk that were never in cache
-            pass
-
-        # Delete from user storage
-        session_storage.delete_session(session_id)
-        history_storage.delete_history(session_id)
+    # Storage deletions are written in one go when the batch exits
+    with session_storage.batch():
+        for session_id in request.session_ids:
+            # Try to delete from manager (in-memory cache)
+            try:
+                await manager.delete_session(session_id)
+            except Exception as e:
+                # Session not in cache, but might still exist in storage
+                # This is expected for sessions loaded from disk that were never in cache
+                pass
+
+            # Delete from user storage
+            session_storage.delete_session(session_id)
+            history_storage.delete_history(session_id)
 
     return DeleteSessionResponse(status="deleted")
 
@@ -232,16 +236,17 @@ async def list_sessions(
     """
     # Get user-specific storage for data isolation
     session_storage = get_user_session_storage(user.username)
-    sessions = session_storage.load_sessions()
+    sessions = session_storage.load_sessions_raw()
 
     return [
         SessionInfo(
-            session_id=s.session_id,
-            name=s.name,
-            first_message=s.first_message,
-            created_at=s.created_at,
-            turn_count=s.turn_count,
-            agent_id=s.agent_id,
+            session_id=s["session_id"],
+            name=s.get("name"),
+            first_message=s.get("first_message"),
+            # Same default SessionData applies to rows saved without one
+            created_at=s.get("created_at") or datetime.now().isoformat(),
+            turn_count=s.get("turn_count", 0),
+            agent_id=s.get("agent_id"),
         )
         for s in sessions
     ]
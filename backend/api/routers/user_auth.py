@@ -7,7 +7,7 @@ import logging
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from api.db.user_database import get_user_by_username, update_last_login, verify_password
+from api.db.user_database import authenticate
 from api.models.user_auth import LoginRequest, LoginResponse, UserInfo
 from api.services.token_service import token_service
 
@@ -38,25 +38,15 @@ async def login(request: LoginRequest) -> LoginResponse:
     Returns:
         LoginResponse with success status, tokens, and user info
     """
-    # Verify credentials
-    if not verify_password(request.username, request.password):
+    # Verify credentials and record the login
+    user = authenticate(request.username, request.password)
+    if user is None:
         logger.warning(f"Failed login attempt for user: {request.username}")
         return LoginResponse(
             success=False,
             error="Invalid username or password"
         )
 
-    # Get user info
-    user = get_user_by_username(request.username)
-    if not user:
-        return LoginResponse(success=False, error="User not found")
-
-    if not user.is_active:
-        return LoginResponse(success=False, error="Account is disabled")
-
-    # Update last login
-    update_last_login(user.id)
-
     # Create user identity token (not access token) for user login flow
     # This ensures the token type is "user_identity" which the middleware expects
     access_token, jti, expires_in = token_service.create_user_identity_token(
@@ -440,6 +440,7 @@ async def websocket_chat(
             await client.disconnect()
         except Exception as e:
             logger.error(f"Error disconnecting SDK client: {e}")
+        history.close()
 
 
 async def _wait_for_authentication(
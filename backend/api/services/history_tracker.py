@@ -111,10 +111,15 @@ class HistoryTracker:
     def finalize_assistant_response(self, metadata: dict | None = None) -> None:
         """Finalize and save the accumulated assistant response.
 
+        Also flushes the session's history (fdatasync when HISTORY_FSYNC is set).
+
         Args:
             metadata: Optional metadata to include with the message.
         """
-        if self._text_parts and self.history:
+        if not self.history:
+            return
+
+        if self._text_parts:
             self.history.append_message(
                 session_id=self.session_id,
                 role=MessageRole.ASSISTANT,
@@ -122,6 +127,7 @@ class HistoryTracker:
                 metadata=metadata
             )
             self._text_parts = []
+        self.history.flush(self.session_id)
 
     def process_event(self, event_type: str, data: dict) -> None:
         """Process an event and update history accordingly.
@@ -22,7 +22,7 @@ from claude_agent_sdk.types import (
     UserMessage,
 )
 
-from api.constants import EventType
+from api.constants import DONE, SESSION_ID, TEXT_DELTA, TOOL_RESULT, TOOL_USE
 
 # Type alias for output format
 OutputFormat = Literal["sse", "ws"]
@@ -36,7 +36,7 @@ def _format_event(
     """Format event data for SSE or WebSocket output.
 
     Args:
-        event_type: The event type string (from EventType enum).
+        event_type: The event type string (see api.constants).
         data: The event payload data.
         output_format: Target format - "sse" or "ws".
 
@@ -71,7 +71,7 @@ def _convert_system_message(
     if not session_id:
         return None
 
-    return _format_event(EventType.SESSION_ID, {"session_id": session_id}, output_format)
+    return _format_event(SESSION_ID, {"session_id": session_id}, output_format)
 
 
 def _convert_stream_event(
@@ -87,14 +87,14 @@ def _convert_stream_event(
 
     if delta_type == "text_delta":
         return _format_event(
-            EventType.TEXT_DELTA,
+            TEXT_DELTA,
             {"text": delta.get("text", "")},
             output_format
         )
     elif delta_type == "tool_result":
         # StreamEvent can contain tool_result deltas with tool_use_id and content
         return _format_event(
-            EventType.TOOL_RESULT,
+            TOOL_RESULT,
             {
                 "tool_use_id": delta.get("tool_use_id"),
                 "content": _normalize_tool_result_content(delta.get("content")),
@@ -112,7 +112,7 @@ def _convert_tool_use_block(
 ) -> dict[str, Any]:
     """Convert ToolUseBlock to event format."""
     return _format_event(
-        EventType.TOOL_USE,
+        TOOL_USE,
         {"id": block.id, "name": block.name, "input": block.input or {}},
         output_format
     )
@@ -124,7 +124,7 @@ def _convert_tool_result_block(
 ) -> dict[str, Any]:
     """Convert ToolResultBlock to event format."""
     return _format_event(
-        EventType.TOOL_RESULT,
+        TOOL_RESULT,
         {
             "tool_use_id": block.tool_use_id,
             "content": _normalize_tool_result_content(block.content),
@@ -157,7 +157,7 @@ def _convert_result_message(
 ) -> dict[str, Any]:
     """Convert ResultMessage to event format."""
     return _format_event(
-        EventType.DONE,
+        DONE,
         {"turn_count": msg.num_turns, "total_cost_usd": msg.total_cost_usd or 0.0},
         output_format
     )
@@ -3,6 +3,7 @@ import hashlib
 import logging
 import time
 import uuid
+from collections import OrderedDict
 from datetime import timedelta
 from typing import Any
 
@@ -15,6 +16,9 @@ logger = logging.getLogger(__name__)
 # Cleanup interval for expired blacklist entries (5 minutes)
 BLACKLIST_CLEANUP_INTERVAL = 300
 
+# Maximum number of verified token payloads kept to skip re-verification
+VERIFIED_TOKEN_CACHE_SIZE = 2048
+
 
 class TokenService:
     """Service for creating, validating, and revoking JWT tokens."""
@@ -32,6 +36,10 @@ class TokenService:
         self._blacklist: dict[str, int] = {}
         self._last_cleanup: int = int(time.time())
 
+        # Verified payloads keyed by SHA-256 of the token (raw tokens are not
+        # kept), in LRU order. Entries are trusted until the token's own exp.
+        self._verified: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
+
     def _generate_jti(self) -> str:
         """Generate a unique JWT ID (jti)."""
         return str(uuid.uuid4())
@@ -185,6 +193,53 @@ class TokenService:
             logger.warning(f"Token validation failed: {e}")
             return None
 
+    def _decode_cached(
+        self,
+        token: str,
+        check_type: str | None = None,
+        log_type_mismatch: bool = True,
+    ) -> dict[str, Any] | None:
+        """Decode a token, reusing earlier successful signature verifications.
+
+        Verified payloads are cached regardless of type, and the type check is
+        applied per call. A cached payload is only returned while its exp lies
+        in the future and its jti has not been revoked since it was cached.
+        The returned dict is shared between callers and must not be mutated.
+
+        Args:
+            token: JWT token string
+            check_type: Expected token type to validate, or None to skip type check
+            log_type_mismatch: Whether to log warning on type mismatch (default True)
+
+        Returns:
+            Decoded token payload if valid, None otherwise
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self._verified.get(key)
+
+        if payload is not None:
+            if payload["exp"] > time.time() and not self.is_token_revoked(payload.get("jti")):
+                self._verified.move_to_end(key)
+            else:
+                del self._verified[key]
+                payload = None
+
+        if payload is None:
+            payload = self._decode_jwt(token, check_type=None)
+            if payload is None:
+                return None
+            if isinstance(payload.get("exp"), (int, float)):
+                self._verified[key] = payload
+                if len(self._verified) > VERIFIED_TOKEN_CACHE_SIZE:
+                    self._verified.popitem(last=False)
+
+        if check_type and payload.get("type") != check_type:
+            if log_type_mismatch:
+                logger.warning(f"Token type mismatch: expected {check_type}, got {payload.get('type')}")
+            return None
+
+        return payload
+
     def decode_and_validate_token(
         self,
         token: str,
@@ -193,6 +248,9 @@ class TokenService:
     ) -> dict[str, Any] | None:
         """Decode and validate a JWT token.
 
+        Signature verification results are cached per token; the type check
+        runs on every call.
+
         Args:
             token: JWT token string
             token_type: Expected token type ("access" or "refresh")
@@ -201,7 +259,7 @@ class TokenService:
         Returns:
             Decoded token payload if valid, None otherwise
         """
-        return self._decode_jwt(token, check_type=token_type, log_type_mismatch=log_type_mismatch)
+        return self._decode_cached(token, check_type=token_type, log_type_mismatch=log_type_mismatch)
 
     def revoke_token(self, jti: str, expiry: int | None = None) -> None:
         """Revoke a token by adding its JTI to the blacklist with TTL.
@@ -328,6 +386,8 @@ class TokenService:
 
         Only verifies signature, expiry, issuer, audience, and blacklist.
         Use this for user authentication where token type doesn't matter.
+        Repeat calls with the same token (e.g. WebSocket reconnects) are
+        served from a cache of verified payloads.
 
         Args:
             token: JWT token string
@@ -335,7 +395,7 @@ class TokenService:
         Returns:
             Decoded token payload if valid, None otherwise
         """
-        return self._decode_jwt(token, check_type=None)
+        return self._decode_cached(token)
 
 
 # Global token service instance
@@ -139,13 +139,13 @@ class DirectClient:
         """List session history."""
         if not self._storage:
             return []
-        sessions = self._storage.load_sessions()
+        sessions = self._storage.load_sessions_raw()
         return [
             {
-                "session_id": s.session_id,
-                "first_message": s.first_message,
-                "turn_count": s.turn_count,
-                "is_current": s.session_id == self.session_id,
+                "session_id": s["session_id"],
+                "first_message": s.get("first_message"),
+                "turn_count": s.get("turn_count", 0),
+                "is_current": s["session_id"] == self.session_id,
             }
             for s in sessions
         ]
@@ -5,6 +5,7 @@ Contains the interactive chat loop and message streaming display functions.
 import asyncio
 import json
 import os
+import threading
 
 from rich.live import Live
 from rich.panel import Panel
@@ -362,6 +363,45 @@ async def process_event(event: dict, streaming: StreamingDisplay, session_id: st
     return handler(event, streaming, session_id, client)
 
 
+async def _read_user_input(prompt: str) -> str:
+    """Read a line from the console without blocking the event loop.
+
+    The blocking read runs on a daemon thread so the client connection keeps
+    being serviced while the user types. A daemon thread (rather than the
+    default executor) is used so an interrupted prompt never delays exit.
+
+    Args:
+        prompt: Prompt text with Rich markup.
+
+    Returns:
+        The line entered by the user.
+
+    Raises:
+        EOFError: If input is closed (Ctrl+D).
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[str] = loop.create_future()
+
+    def resolve(result: str | None, error: BaseException | None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def read() -> None:
+        try:
+            result = console.input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, result, None)
+
+    threading.Thread(target=read, name="chat-input", daemon=True).start()
+    return await future
+
+
 async def async_chat(client) -> None:
     """Async chat loop implementation.
 
@@ -400,57 +440,67 @@ async def async_chat(client) -> None:
 
     turn_count = 0
 
-    while True:
-        try:
-            theme = get_theme()
-            user_input = console.input(f"\n[Turn {turn_count + 1}] [{theme.colors.user}]You:[/{theme.colors.user}] ")
-
-            handled, should_break = await handle_command(user_input, cmd_ctx)
-            if should_break:
+    try:
+        while True:
+            try:
+                theme = get_theme()
+                user_input = await _read_user_input(f"\n[Turn {turn_count + 1}] [{theme.colors.user}]You:[/{theme.colors.user}] ")
+
+                command = user_input.strip().lower()
+                if not command:
+                    continue
+
+                handled, should_break = await handle_command(user_input, cmd_ctx, command)
+                if should_break:
+                    break
+                if handled:
+                    cmd_ctx.current_session_id = client.session_id
+                    session_id = client.session_id
+                    # Match handle_command: resume takes its ID after any
+                    # whitespace, a bare 'agent' only lists agents
+                    verb, *args = command.split(maxsplit=1)
+                    if verb in ('new', 'resume') or (verb == 'agent' and args):
+                        turn_count = 0
+                    continue
+
+                display_user_message(user_input)
+
+                streaming = StreamingDisplay()
+                try:
+                    async for event in client.send_message(user_input):
+                        new_session_id, question_data = await process_event(event, streaming, session_id, client)
+                        if new_session_id:
+                            session_id = new_session_id
+                            cmd_ctx.current_session_id = session_id
+
+                        if question_data and hasattr(client, 'send_answer'):
+                            await client.send_answer(
+                                question_data["question_id"],
+                                question_data["answers"]
+                            )
+
+                    streaming.close()
+                    console.print()
+                    turn_count += 1
+
+                    if hasattr(client, 'update_turn_count'):
+                        client.update_turn_count(turn_count)
+
+                except Exception as e:
+                    streaming.close()
+                    print_error(f"\nError during message: {e}")
+                    continue
+
+            # Ctrl+C while awaiting the prompt or a response arrives as
+            # CancelledError on the running task rather than KeyboardInterrupt
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                print_warning("\nExiting...")
                 break
-            if handled:
-                cmd_ctx.current_session_id = client.session_id
-                session_id = client.session_id
-                cmd_lower = user_input.lower().strip()
-                if cmd_lower in ('new', 'resume') or cmd_lower.startswith('resume ') or cmd_lower.startswith('agent '):
-                    turn_count = 0
-                continue
-
-            display_user_message(user_input)
+            except EOFError:
+                break
+    finally:
+        await client.disconnect()
 
-            streaming = StreamingDisplay()
-            try:
-                async for event in client.send_message(user_input):
-                    new_session_id, question_data = await process_event(event, streaming, session_id, client)
-                    if new_session_id:
-                        session_id = new_session_id
-                        cmd_ctx.current_session_id = session_id
-
-                    if question_data and hasattr(client, 'send_answer'):
-                        await client.send_answer(
-                            question_data["question_id"],
-                            question_data["answers"]
-                        )
-
-                streaming.close()
-                console.print()
-                turn_count += 1
-
-                if hasattr(client, 'update_turn_count'):
-                    client.update_turn_count(turn_count)
-
-            except Exception as e:
-                streaming.close()
-                print_error(f"\nError during message: {e}")
-                continue
-
-        except KeyboardInterrupt:
-            print_warning("\nExiting...")
-            break
-        except EOFError:
-            break
-
-    await client.disconnect()
     print_success(f"Conversation ended after {turn_count} turns.")
 
 
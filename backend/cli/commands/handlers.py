@@ -183,7 +183,11 @@ async def show_sessions(
         print_warning("No sessions found.")
 
 
-async def handle_command(user_input: str, ctx: CommandContext) -> CommandResult:
+async def handle_command(
+    user_input: str,
+    ctx: CommandContext,
+    command: str | None = None,
+) -> CommandResult:
     """Handle a CLI command and return whether it was processed.
 
     This function processes built-in commands like 'exit', 'help', 'skills', etc.
@@ -193,13 +197,16 @@ async def handle_command(user_input: str, ctx: CommandContext) -> CommandResult:
     Args:
         user_input: The user's input string.
         ctx: Command context with callbacks for various operations.
+        command: Optional pre-normalized (stripped, lowercased) input, so
+            callers that already computed it avoid doing so twice.
 
     Returns:
         Tuple of (handled, should_break):
         - handled: True if the input was a recognized command
         - should_break: True if the main loop should exit
     """
-    command = user_input.lower().strip()
+    if command is None:
+        command = user_input.strip().lower()
 
     # Exit command
     if command == 'exit':
@@ -251,8 +258,8 @@ async def handle_command(user_input: str, ctx: CommandContext) -> CommandResult:
             return (True, True)
 
     # Resume command (with optional session ID)
-    if command.startswith('resume'):
-        parts = user_input.split(maxsplit=1)
+    parts = user_input.split(maxsplit=1)
+    if parts and parts[0].lower() == 'resume':
         resume_id = parts[1].strip() if len(parts) > 1 else None
 
         try:
@@ -21,6 +21,16 @@ DEFAULT_USERNAME = os.getenv("CLI_USERNAME", "admin")
 DEFAULT_PASSWORD = os.getenv("CLI_ADMIN_PASSWORD")
 
 
+@pytest.fixture(autouse=True)
+def _clear_verify_cache():
+    """Keep cached password checks from leaking between tests."""
+    from api.db.user_database import clear_verify_cache
+
+    clear_verify_cache()
+    yield
+    clear_verify_cache()
+
+
 @pytest.fixture(scope="module")
 def client():
     """Create a test client for the FastAPI application."""
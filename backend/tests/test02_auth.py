@@ -5,6 +5,7 @@ Run: pytest tests/test02_auth.py -v
 """
 
 import time
+from unittest.mock import patch
 
 import pytest
 from jose import jwt
@@ -280,6 +281,45 @@ class TestTokenService:
         payload = service.decode_and_validate_token(token, token_type="access")
         assert payload is None
 
+    def test_decode_any_type_reuses_verified_payload(self):
+        """Test that repeat decodes of the same token skip re-verification."""
+        service = TokenService()
+        token, _, _ = service.create_user_identity_token(
+            user_id="test_user", username="testuser", role="user"
+        )
+
+        first = service.decode_token_any_type(token)
+        with patch.object(service, "_decode_jwt") as mock_decode:
+            second = service.decode_token_any_type(token)
+
+        assert second is first
+        mock_decode.assert_not_called()
+
+    def test_typed_decode_shares_cache_and_checks_type(self):
+        """Test that typed decodes reuse the cache but still enforce the type."""
+        service = TokenService()
+        token, _, _ = service.create_user_identity_token(
+            user_id="test_user", username="testuser", role="user"
+        )
+
+        first = service.decode_token_any_type(token)
+        with patch.object(service, "_decode_jwt") as mock_decode:
+            assert service.decode_user_identity_token(token) is first
+            assert service.decode_and_validate_token(token, token_type="access") is None
+
+        mock_decode.assert_not_called()
+
+    def test_decode_any_type_cache_honors_revocation(self):
+        """Test that a cached token is rejected once its jti is revoked."""
+        service = TokenService()
+        token, jti, _ = service.create_user_identity_token(
+            user_id="test_user", username="testuser", role="user"
+        )
+
+        assert service.decode_token_any_type(token) is not None
+        service.revoke_token(jti)
+        assert service.decode_token_any_type(token) is None
+
 
 class TestWsTokenEndpoint:
     """Test cases for /auth/ws-token endpoint."""
@@ -0,0 +1,109 @@
+"""Tests for the interactive chat loop in cli.commands.chat.
+
+Covers:
+- Ctrl+C at the prompt (delivered as CancelledError) still disconnects
+- Errors raised inside the loop still disconnect the client
+- Session-switching commands reset the turn counter
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from cli.commands import chat
+
+
+@pytest.fixture
+def client():
+    """Create a mock chat client with an async disconnect."""
+    mock_client = MagicMock()
+    mock_client.create_session = AsyncMock(return_value={"session_id": "session-1"})
+    mock_client.disconnect = AsyncMock()
+    return mock_client
+
+
+class TestAsyncChatShutdown:
+    """Tests that async_chat always releases the client connection."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_prompt_disconnects_client(self, client):
+        """Test that cancelling the task while waiting for input disconnects."""
+        prompt_waiting = asyncio.Event()
+
+        async def blocked_input(prompt):
+            prompt_waiting.set()
+            await asyncio.Event().wait()
+
+        with patch.object(chat, "_read_user_input", blocked_input):
+            task = asyncio.create_task(chat.async_chat(client))
+            await prompt_waiting.wait()
+            task.cancel()
+            await task
+
+        client.disconnect.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_eof_disconnects_client(self, client):
+        """Test that Ctrl+D at the prompt ends the loop and disconnects."""
+        with patch.object(chat, "_read_user_input", AsyncMock(side_effect=EOFError)):
+            await chat.async_chat(client)
+
+        client.disconnect.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unexpected_error_still_disconnects_client(self, client):
+        """Test that an error escaping the loop still disconnects."""
+        with patch.object(chat, "_read_user_input", AsyncMock(side_effect=RuntimeError("boom"))):
+            with pytest.raises(RuntimeError):
+                await chat.async_chat(client)
+
+        client.disconnect.assert_awaited_once()
+
+
+class TestTurnCountReset:
+    """Tests that switching sessions restarts the turn counter."""
+
+    async def run_chat(self, client, inputs):
+        """Drive async_chat with inputs and return the prompts it showed."""
+        prompts = []
+
+        async def fake_input(prompt):
+            prompts.append(prompt)
+            if not inputs:
+                raise EOFError
+            return inputs.pop(0)
+
+        async def no_events(message):
+            return
+            yield
+
+        client.send_message = no_events
+        with patch.object(chat, "_read_user_input", fake_input), \
+                patch.object(chat, "StreamingDisplay", MagicMock()):
+            await chat.async_chat(client)
+        return prompts
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "command", ["new", "resume", "resume abc-123", "resume\tabc-123", "agent general"]
+    )
+    async def test_session_switch_resets_turns(self, client, command):
+        """Test that new, resume (any whitespace) and agent <id> reset the count."""
+        client.switch_agent = AsyncMock(return_value={})
+        client.resume_previous_session = AsyncMock(return_value={"session_id": "previous-id"})
+
+        prompts = await self.run_chat(client, ["hello", command])
+
+        assert "[Turn 2]" in prompts[1]
+        assert "[Turn 1]" in prompts[2]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("command", ["agent", "sessions"])
+    async def test_other_commands_keep_turns(self, client, command):
+        """Test that listing commands leave the turn count alone."""
+        client.list_agents = AsyncMock(return_value=[])
+        client.list_sessions = AsyncMock(return_value=[])
+
+        prompts = await self.run_chat(client, ["hello", command])
+
+        assert "[Turn 2]" in prompts[2]
@@ -0,0 +1,68 @@
+"""Tests for CLI command parsing in cli.commands.handlers."""
+from unittest.mock import AsyncMock
+
+import pytest
+
+from cli.commands.handlers import CommandContext, handle_command
+
+
+@pytest.fixture
+def ctx():
+    """Create a CommandContext with async mock callbacks."""
+    return CommandContext(
+        list_skills=AsyncMock(return_value=[]),
+        list_agents=AsyncMock(return_value=[]),
+        list_subagents=AsyncMock(return_value=[]),
+        list_sessions=AsyncMock(return_value=[]),
+        interrupt=AsyncMock(return_value=True),
+        create_session=AsyncMock(return_value={"session_id": "resumed-id"}),
+        close_session=AsyncMock(),
+        resume_previous_session=AsyncMock(return_value={"session_id": "previous-id"}),
+    )
+
+
+class TestResumeCommand:
+    """Tests for parsing the resume command."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "user_input",
+        [
+            "resume abc-123",
+            "resume\tabc-123",
+            "resume   abc-123  ",
+            "  RESUME abc-123",
+            "resume\n abc-123",
+        ],
+    )
+    async def test_resume_with_id_on_any_whitespace(self, ctx, user_input):
+        """Test that the session ID is split off on any whitespace."""
+        result = await handle_command(user_input, ctx)
+
+        assert result == (True, False)
+        ctx.create_session.assert_awaited_once_with("abc-123")
+        ctx.resume_previous_session.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("user_input", ["resume", "  resume  ", "Resume\t"])
+    async def test_resume_without_id_resumes_previous(self, ctx, user_input):
+        """Test that a bare resume falls back to the previous session."""
+        result = await handle_command(user_input, ctx)
+
+        assert result == (True, False)
+        ctx.resume_previous_session.assert_awaited_once()
+        ctx.create_session.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_resume_prefix_is_not_a_command(self, ctx):
+        """Test that words merely starting with resume are not handled."""
+        result = await handle_command("resumes are great", ctx)
+
+        assert result == (False, False)
+        ctx.create_session.assert_not_awaited()
+        ctx.resume_previous_session.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_empty_input_is_not_a_command(self, ctx):
+        """Test that whitespace-only input is not handled."""
+        assert await handle_command(" \t ", ctx) == (False, False)
@@ -0,0 +1,147 @@
+"""Tests for agent.core.agent_options option caching.
+
+Covers:
+- Cached options are rebuilt when agents.yaml or subagents.yaml changes
+- Uncached (resume / can_use_tool) builds also see subagents.yaml edits
+- Each caller receives its own copy of nested dicts and lists
+"""
+import os
+
+import pytest
+
+import agent.core.agent_options as agent_options
+import agent.core.agents as agents
+import agent.core.subagents as subagents
+
+AGENTS_YAML = """
+default_agent: test-agent
+agents:
+  test-agent:
+    system_prompt: "{prompt}"
+    tools: [Read, Write]
+  filtered-agent:
+    system_prompt: "{prompt}"
+    subagents: [helper]
+"""
+
+SUBAGENTS_YAML = """
+subagents:
+  helper:
+    description: "{description}"
+    prompt: "Help out"
+"""
+
+
+def write_config(path, content, mtime_ns):
+    """Write a config file and pin its mtime so changes are detectable."""
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def config_files(tmp_path, monkeypatch):
+    """Point the options builder at temporary agents/subagents YAML files."""
+    agents_path = tmp_path / "agents.yaml"
+    subagents_path = tmp_path / "subagents.yaml"
+    write_config(agents_path, AGENTS_YAML.format(prompt="first"), 1_000_000_000)
+    write_config(subagents_path, SUBAGENTS_YAML.format(description="first"), 1_000_000_000)
+
+    monkeypatch.setattr(agents, "AGENTS_CONFIG_PATH", agents_path)
+    monkeypatch.setattr(subagents, "SUBAGENTS_CONFIG_PATH", subagents_path)
+    monkeypatch.setattr(
+        agent_options, "_OPTIONS_CONFIG_PATHS", (agents_path, subagents_path)
+    )
+    monkeypatch.setattr(agent_options, "get_active_provider", lambda: None)
+    agent_options.clear_options_cache()
+    yield agents_path, subagents_path
+    agent_options.clear_options_cache()
+
+
+class TestCachedOptionsInvalidation:
+    """Tests that cached options follow edits to the YAML config."""
+
+    def test_options_are_cached_while_config_is_unchanged(self, config_files):
+        """Test that repeated builds reuse the cached template."""
+        agent_options.create_agent_sdk_options()
+        agent_options.create_agent_sdk_options()
+
+        info = agent_options._build_cached_agent_sdk_options.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+
+    def test_agents_yaml_change_rebuilds_options(self, config_files):
+        """Test that editing agents.yaml is picked up on the next build."""
+        agents_path, _ = config_files
+        first = agent_options.create_agent_sdk_options()
+        assert first.system_prompt["append"] == "first"
+
+        write_config(agents_path, AGENTS_YAML.format(prompt="second"), 2_000_000_000)
+
+        second = agent_options.create_agent_sdk_options()
+        assert second.system_prompt["append"] == "second"
+
+    def test_subagents_yaml_change_rebuilds_options(self, config_files):
+        """Test that editing subagents.yaml is picked up on the next build."""
+        _, subagents_path = config_files
+        first = agent_options.create_agent_sdk_options()
+        assert first.agents["helper"].description == "first"
+
+        write_config(
+            subagents_path, SUBAGENTS_YAML.format(description="second"), 2_000_000_000
+        )
+
+        second = agent_options.create_agent_sdk_options()
+        assert second.agents["helper"].description == "second"
+
+    @pytest.mark.parametrize("agent_id", [None, "filtered-agent"])
+    @pytest.mark.parametrize(
+        "build_kwargs",
+        [{"resume_session_id": "session-1"}, {"can_use_tool": lambda *args: None}],
+    )
+    def test_subagents_yaml_change_reaches_uncached_builds(
+        self, config_files, agent_id, build_kwargs
+    ):
+        """Test that resumed and callback builds do not keep stale subagents."""
+        _, subagents_path = config_files
+        first = agent_options.create_agent_sdk_options(agent_id, **build_kwargs)
+        assert first.agents["helper"].description == "first"
+
+        write_config(
+            subagents_path, SUBAGENTS_YAML.format(description="second"), 2_000_000_000
+        )
+
+        second = agent_options.create_agent_sdk_options(agent_id, **build_kwargs)
+        assert second.agents["helper"].description == "second"
+
+
+class TestCachedOptionsIsolation:
+    """Tests that callers cannot mutate each other's options."""
+
+    def test_nested_containers_are_not_shared(self, config_files):
+        """Test that nested dicts and lists are private to each caller."""
+        first = agent_options.create_agent_sdk_options()
+        second = agent_options.create_agent_sdk_options()
+
+        assert first.agents is not second.agents
+        assert first.allowed_tools is not second.allowed_tools
+        assert first.env is not second.env
+
+        first.agents.pop("helper")
+        first.allowed_tools.append("Bash")
+        first.env["LEAK"] = "1"
+
+        third = agent_options.create_agent_sdk_options()
+        assert "helper" in third.agents
+        assert third.allowed_tools == ["Read", "Write"]
+        assert "LEAK" not in third.env
+
+    def test_debug_extra_args_not_shared(self, config_files, monkeypatch):
+        """Test that extra_args is a fresh dict rather than the module constant."""
+        monkeypatch.setattr(agent_options, "_DEBUG_ENABLED", True)
+        agent_options.clear_options_cache()
+
+        options = agent_options.create_agent_sdk_options()
+        options.extra_args["leak"] = "1"
+
+        assert "leak" not in agent_options._DEBUG_EXTRA_ARGS
+        assert options.extra_args is not agent_options._DEBUG_EXTRA_ARGS
@@ -0,0 +1,47 @@
+"""Tests for agent.core.config.
+
+Covers:
+- .env is loaded when the module is imported and overrides the environment
+- Lazy provider resolution does not reload .env
+"""
+import importlib
+import os
+from unittest.mock import patch
+
+import pytest
+
+import agent
+import agent.core.config as config
+
+
+@pytest.fixture
+def reload_config(tmp_path, monkeypatch):
+    """Reload agent.core.config against a temporary project root."""
+    monkeypatch.setattr(agent, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setenv("CONFIG_TEST_KEY", "from-environ")
+    (tmp_path / ".env").write_text("CONFIG_TEST_KEY=from-dotenv\n")
+
+    yield lambda: importlib.reload(config)
+
+    monkeypatch.undo()
+    # Restore the module for the real project root without re-applying .env
+    with patch("dotenv.load_dotenv"):
+        importlib.reload(config)
+
+
+class TestDotenvLoading:
+    """Tests for when .env is applied."""
+
+    def test_dotenv_loaded_on_import(self, reload_config):
+        """Test that importing the module applies .env over the environment."""
+        reload_config()
+
+        assert os.environ["CONFIG_TEST_KEY"] == "from-dotenv"
+
+    def test_provider_resolution_keeps_later_environment(self, reload_config, monkeypatch):
+        """Test that resolving the provider does not reload .env."""
+        reload_config()
+        monkeypatch.setenv("CONFIG_TEST_KEY", "set-after-import")
+
+        assert config.get_active_provider() == "claude"
+        assert os.environ["CONFIG_TEST_KEY"] == "set-after-import"
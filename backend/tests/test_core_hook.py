@@ -0,0 +1,313 @@
+"""Tests for agent.core.hook permission matching.
+
+Covers:
+- _PrefixTrie answers exactly like str.startswith(tuple(prefixes))
+- _minimize_prefixes never changes a startswith decision
+- The cached Write/Edit and Bash decisions of create_permission_hook
+- Redirect target extraction by _REDIRECT_RE
+"""
+import asyncio
+import random
+
+import pytest
+
+from agent.core import hook
+from agent.core.hook import (
+    _PREFIX_TRIE_THRESHOLD,
+    _REDIRECT_RE,
+    _PrefixTrie,
+    _minimize_prefixes,
+    create_permission_hook,
+)
+
+# Prefixes and paths chosen to hit component boundaries, partial
+# components, trailing slashes, the empty prefix and relative paths
+EDGE_PREFIXES = [
+    "",
+    "/",
+    "/tmp",
+    "/tmp/",
+    "/tmp/ab",
+    "/tmp/abc",
+    "/tmp/ab/",
+    "/home/user/project",
+    "/home/user/project/",
+    "relative/dir",
+    "//double",
+]
+
+EDGE_PATHS = [
+    "",
+    "/",
+    "/tmp",
+    "/tmp/",
+    "/tmpfile",
+    "/tmp/a",
+    "/tmp/ab",
+    "/tmp/abc",
+    "/tmp/abd/file",
+    "/tmp/ab/file",
+    "/tmp/abc/file",
+    "/home/user/project",
+    "/home/user/projectile/x",
+    "/home/user/project/src/main.py",
+    "/home/user",
+    "/etc/passwd",
+    "relative/dir/file",
+    "relative/directory",
+    "relative",
+    "//double/x",
+    "/double",
+]
+
+
+def random_paths(rng, count):
+    """Generate short paths over a tiny alphabet so prefixes collide often."""
+    alphabet = ["/", "a", "b", "ab", "/a", "/b", "/ab"]
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+def run_hook(matcher, tool_name, tool_input):
+    """Invoke the hook coroutine of a HookMatcher synchronously."""
+    callback = matcher.hooks[0]
+    return asyncio.run(callback({"tool_name": tool_name, "tool_input": tool_input}, None, None))
+
+
+class TestPrefixTrie:
+    """Tests that _PrefixTrie matches tuple startswith exactly."""
+
+    @pytest.mark.parametrize("prefix", EDGE_PREFIXES)
+    @pytest.mark.parametrize("path", EDGE_PATHS)
+    def test_single_prefix_matches_startswith(self, prefix, path):
+        """Test every edge-case prefix against every edge-case path."""
+        trie = _PrefixTrie([prefix])
+        assert trie.contains_prefix_of(path) == path.startswith(prefix)
+
+    @pytest.mark.parametrize("path", EDGE_PATHS)
+    def test_all_edge_prefixes_match_startswith(self, path):
+        """Test the full edge-case prefix set at once."""
+        prefixes = tuple(p for p in EDGE_PREFIXES if p)
+        assert _PrefixTrie(prefixes).contains_prefix_of(path) == path.startswith(prefixes)
+
+    def test_partial_component_is_not_a_directory_match(self):
+        """Test that /tmp/ab and /tmp/abc behave like plain startswith."""
+        trie = _PrefixTrie(["/tmp/abc"])
+        assert trie.contains_prefix_of("/tmp/abc/file")
+        assert trie.contains_prefix_of("/tmp/abcdef")
+        assert not trie.contains_prefix_of("/tmp/ab")
+        assert not trie.contains_prefix_of("/tmp/ab/file")
+
+    def test_trailing_slash_requires_child(self):
+        """Test that a trailing-slash prefix does not match the bare directory."""
+        trie = _PrefixTrie(["/tmp/"])
+        assert trie.contains_prefix_of("/tmp/x")
+        assert not trie.contains_prefix_of("/tmp")
+        assert not trie.contains_prefix_of("/tmpfile")
+
+    def test_empty_prefix_matches_everything(self):
+        """Test that the empty prefix matches any path, as startswith does."""
+        trie = _PrefixTrie([""])
+        assert all(trie.contains_prefix_of(path) for path in EDGE_PATHS)
+
+    def test_empty_trie_matches_nothing(self):
+        """Test that a trie without prefixes never matches."""
+        trie = _PrefixTrie()
+        assert not any(trie.contains_prefix_of(path) for path in EDGE_PATHS)
+
+    def test_random_prefix_sets_match_startswith(self):
+        """Test many random prefix sets, including more than the threshold."""
+        rng = random.Random(1234)
+        for size in (1, 2, 5, _PREFIX_TRIE_THRESHOLD + 1, 64):
+            for _ in range(50):
+                prefixes = tuple(random_paths(rng, size))
+                trie = _PrefixTrie(prefixes)
+                for path in random_paths(rng, 40) + EDGE_PATHS:
+                    assert trie.contains_prefix_of(path) == path.startswith(prefixes), (
+                        prefixes, path
+                    )
+
+
+class TestMinimizePrefixes:
+    """Tests that _minimize_prefixes preserves startswith decisions."""
+
+    def test_drops_covered_and_duplicate_prefixes(self):
+        """Test that prefixes covered by a shorter one are removed."""
+        assert _minimize_prefixes(["/a/b", "/a", "/a", "/c"]) == ("/a", "/c")
+
+    def test_partial_component_prefix_covers_longer_name(self):
+        """Test that /tmp/ab covers /tmp/abc, matching startswith semantics."""
+        assert _minimize_prefixes(["/tmp/abc", "/tmp/ab"]) == ("/tmp/ab",)
+
+    def test_trailing_slash_is_kept_distinct(self):
+        """Test that /tmp/ does not replace /tmp, and /tmp covers /tmp/."""
+        assert _minimize_prefixes(["/tmp/"]) == ("/tmp/",)
+        assert _minimize_prefixes(["/tmp/", "/tmp"]) == ("/tmp",)
+
+    def test_empty_prefix_covers_everything(self):
+        """Test that the empty prefix absorbs all others."""
+        assert _minimize_prefixes(["/a", "", "/b"]) == ("",)
+
+    @pytest.mark.parametrize("size", [1, 3, _PREFIX_TRIE_THRESHOLD + 1, 40])
+    def test_random_sets_keep_decisions(self, size):
+        """Test that minimizing never changes which paths are allowed."""
+        rng = random.Random(size)
+        for _ in range(100):
+            prefixes = tuple(random_paths(rng, size))
+            minimized = _minimize_prefixes(prefixes)
+            for path in random_paths(rng, 30) + EDGE_PATHS:
+                assert path.startswith(minimized) == path.startswith(prefixes), (
+                    prefixes, path
+                )
+
+
+class TestWriteEditDecisions:
+    """Tests for Write/Edit decisions through create_permission_hook."""
+
+    @pytest.fixture(params=["tuple", "trie"])
+    def allowed(self, request):
+        """Return an allowed-directory list below or above the trie threshold."""
+        base = ["/home/user/project", "/tmp/ab"]
+        if request.param == "trie":
+            base += [f"/srv/data{i}/" for i in range(_PREFIX_TRIE_THRESHOLD + 1)]
+        return base
+
+    def test_matches_startswith_for_edge_paths(self, allowed):
+        """Test that hook decisions equal startswith on the raw list."""
+        matcher = create_permission_hook(allowed_directories=allowed)
+        prefixes = tuple(allowed)
+        for path in EDGE_PATHS + ["/srv/data3/file", "/srv/data3", "/srv/data99/x"]:
+            for tool in ("Write", "Edit"):
+                result = run_hook(matcher, tool, {"file_path": path})
+                assert (result == {}) == path.startswith(prefixes), (tool, path)
+
+    def test_denial_message(self):
+        """Test the block response for a path outside allowed directories."""
+        matcher = create_permission_hook(allowed_directories=["/tmp"])
+        result = run_hook(matcher, "Write", {"file_path": "/etc/passwd"})
+        assert result["decision"] == "block"
+        assert "Write/Edit access denied: /etc/passwd" in result["systemMessage"]
+        assert "Allowed directories: /tmp" in result["systemMessage"]
+
+    def test_cached_decisions_return_fresh_responses(self):
+        """Test that a cached denial is not a shared, mutable response."""
+        matcher = create_permission_hook(allowed_directories=["/tmp"])
+        first = run_hook(matcher, "Write", {"file_path": "/etc/passwd"})
+        first["decision"] = "mutated"
+
+        second = run_hook(matcher, "Write", {"file_path": "/etc/passwd"})
+        assert second["decision"] == "block"
+        assert second is not first
+
+    def test_hooks_do_not_share_decision_caches(self):
+        """Test that decisions are cached per hook configuration."""
+        strict = create_permission_hook(allowed_directories=["/tmp"])
+        loose = create_permission_hook(allowed_directories=["/etc"])
+
+        assert run_hook(strict, "Write", {"file_path": "/etc/hosts"})["decision"] == "block"
+        assert run_hook(loose, "Write", {"file_path": "/etc/hosts"}) == {}
+
+    def test_missing_tool_input(self):
+        """Test that a call without tool_input is decided on an empty path."""
+        matcher = create_permission_hook(allowed_directories=["/tmp"])
+        result = asyncio.run(matcher.hooks[0]({"tool_name": "Write"}, None, None))
+        assert result["decision"] == "block"
+        assert hook._EMPTY_TOOL_INPUT == {}
+
+
+class TestRedirectRegex:
+    """Tests for redirect target extraction."""
+
+    @pytest.mark.parametrize(
+        "command, targets",
+        [
+            ("echo hi > out.txt", ["out.txt"]),
+            ("echo hi >out.txt", ["out.txt"]),
+            ("echo hi >> log.txt", ["log.txt"]),
+            ("echo hi >>log.txt", ["log.txt"]),
+            ("cmd 2>err.txt", ["err.txt"]),
+            ("cmd 2> err.txt", ["err.txt"]),
+            ("cmd > /tmp/a; cat b", ["/tmp/a"]),
+            ("cmd > /tmp/a|wc", ["/tmp/a"]),
+            ("cmd 2>&1", []),
+            ("cmd > a >> b", ["a", "b"]),
+            ("echo 'quoted' > \"/tmp/q.txt\"", ['"/tmp/q.txt"']),
+            ("ls -la", []),
+        ],
+    )
+    def test_targets(self, command, targets):
+        """Test which redirect targets are extracted from a command."""
+        assert _REDIRECT_RE.findall(command) == targets
+
+
+class TestBashDecisions:
+    """Tests for Bash decisions through create_permission_hook."""
+
+    @pytest.fixture
+    def matcher(self):
+        """Create a hook allowing /tmp and a project directory."""
+        return create_permission_hook(allowed_directories=["/tmp", "/work/proj"])
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "echo hi > /tmp/out",
+            "echo hi >> /tmp/out",
+            "echo hi >>/tmp/out",
+            "cmd 2>/tmp/err",
+            "cmd > /dev/null 2>&1",
+            "echo hi > '/tmp/quoted'",
+            "echo hi > /work/proj/file",
+            # Directories are plain string prefixes, as documented
+            "echo hi > /work/projx/file",
+            "ls -la",
+        ],
+    )
+    def test_allowed_commands(self, matcher, command):
+        """Test commands that stay within allowed redirect targets."""
+        assert run_hook(matcher, "Bash", {"command": command}) == {}
+
+    @pytest.mark.parametrize(
+        "command, target",
+        [
+            ("echo hi > /etc/out", "/etc/out"),
+            ("echo hi >> /etc/out", "/etc/out"),
+            ("echo hi >>/etc/out", "/etc/out"),
+            ("cmd 2>/etc/err", "/etc/err"),
+            ("echo hi > relative.txt", "relative.txt"),
+            ("echo hi > /tmp/ok > /etc/bad", "/etc/bad"),
+        ],
+    )
+    def test_denied_redirects(self, matcher, command, target):
+        """Test redirects outside allowed directories are blocked."""
+        result = run_hook(matcher, "Bash", {"command": command})
+        assert result["decision"] == "block"
+        assert f"Bash redirection denied: {target}" in result["systemMessage"]
+
+    @pytest.mark.parametrize("command", ["rm -rf /tmp/x", "ls && mv a b", "touch /tmp/f"])
+    def test_blocked_commands(self, matcher, command):
+        """Test default blocked command patterns."""
+        result = run_hook(matcher, "Bash", {"command": command})
+        assert result["decision"] == "block"
+        assert result["systemMessage"].startswith(f"Bash command blocked: {command}")
+
+    def test_redirection_allowed_when_enabled(self):
+        """Test that allow_bash_redirection skips the redirect check."""
+        matcher = create_permission_hook(
+            allowed_directories=["/tmp"], allow_bash_redirection=True
+        )
+        assert run_hook(matcher, "Bash", {"command": "echo hi > /etc/out"}) == {}
+
+    def test_cached_and_uncached_decisions_agree(self, matcher):
+        """Test that repeated commands get the same decision from cache."""
+        commands = ["echo a > /etc/x", "echo a > /tmp/x", "rm f", "pwd"]
+        first = [run_hook(matcher, "Bash", {"command": c}) for c in commands]
+        second = [run_hook(matcher, "Bash", {"command": c}) for c in commands]
+        assert first == second
+
+    def test_decision_cache_is_bounded(self, matcher):
+        """Test that more distinct commands than the cache size still decide correctly."""
+        for i in range(hook._DECISION_CACHE_SIZE + 10):
+            allowed = i % 2 == 0
+            target = f"/tmp/f{i}" if allowed else f"/etc/f{i}"
+            result = run_hook(matcher, "Bash", {"command": f"echo > {target}"})
+            assert (result == {}) == allowed
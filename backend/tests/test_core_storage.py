@@ -0,0 +1,553 @@
+"""Tests for agent.core.storage.
+
+Covers:
+- SessionStorage snapshot + append-only log format
+- Log replay of put/del records and MAX_SESSIONS eviction
+- Compaction once the log exceeds COMPACT_THRESHOLD, under the storage lock
+- Recovery from corrupted or truncated log lines
+- Reading legacy plain-array files
+- Several instances sharing one sessions file
+- HistoryStorage per-session writers, cross-instance visibility and deletes,
+  flush/close and exit handling
+"""
+import gc
+import json
+from unittest.mock import patch
+
+import pytest
+
+import agent.core.storage as storage
+from agent.core.storage import HistoryStorage, SessionStorage
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Return an empty data directory."""
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def sessions_file(data_dir):
+    """Return the sessions file path inside data_dir."""
+    return data_dir / storage.SESSIONS_FILENAME
+
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    """Shrink MAX_SESSIONS and COMPACT_THRESHOLD so limits are easy to cross."""
+    monkeypatch.setattr(storage, "MAX_SESSIONS", 3)
+    monkeypatch.setattr(storage, "COMPACT_THRESHOLD", 5)
+
+
+def read_log_lines(sessions_file):
+    """Return the parsed log records that follow the snapshot."""
+    content = sessions_file.read_text()
+    _, end = json.JSONDecoder().raw_decode(content)
+    return [json.loads(line) for line in content[end:].splitlines() if line.strip()]
+
+
+class TestSessionLogFormat:
+    """Tests for the on-disk snapshot + log layout."""
+
+    def test_new_file_is_plain_json_array(self, data_dir, sessions_file):
+        """Test that a fresh storage file is an empty JSON array."""
+        SessionStorage(data_dir=data_dir)
+        assert json.loads(sessions_file.read_text()) == []
+
+    def test_mutations_append_log_records(self, data_dir, sessions_file):
+        """Test that save/update/delete append records instead of rewriting."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1", first_message="hi")
+        store.update_session("s1", turn_count=2)
+        store.delete_session("s1")
+
+        records = read_log_lines(sessions_file)
+        assert [r["op"] for r in records] == ["put", "put", "del"]
+        assert records[1]["session"]["turn_count"] == 2
+        assert records[2] == {"op": "del", "session_id": "s1"}
+
+    def test_file_with_log_is_not_plain_json(self, data_dir, sessions_file):
+        """Test that a non-empty log makes the file unreadable as plain JSON.
+
+        Older releases parse sessions.json with json.load, so they can only
+        read the file again once it has been compacted.
+        """
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1")
+
+        assert sessions_file.read_text().startswith("[]")
+        with pytest.raises(json.JSONDecodeError):
+            json.loads(sessions_file.read_text())
+
+
+class TestSessionLogReplay:
+    """Tests for rebuilding sessions from the snapshot and log."""
+
+    def test_replay_put_and_del_records(self, data_dir):
+        """Test that a fresh instance sees the same sessions as the writer."""
+        writer = SessionStorage(data_dir=data_dir)
+        writer.save_session("s1", first_message="one", user_id="alice")
+        writer.save_session("s2", first_message="two")
+        writer.save_session("s3", first_message="three")
+        writer.update_session("s1", name="renamed", turn_count=4)
+        writer.delete_session("s2")
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == ["s3", "s1"]
+        session = reader.get_session("s1")
+        assert session.name == "renamed"
+        assert session.turn_count == 4
+        assert session.user_id == "alice"
+        assert reader.get_session("s2") is None
+
+    def test_update_keeps_session_position(self, data_dir):
+        """Test that replayed updates do not move a session to the end."""
+        writer = SessionStorage(data_dir=data_dir)
+        writer.save_session("s1")
+        writer.save_session("s2")
+        writer.update_session("s1", turn_count=1)
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == ["s2", "s1"]
+
+    def test_max_sessions_eviction_matches_writer(self, data_dir, small_limits):
+        """Test that replay evicts the oldest sessions just like save_session."""
+        writer = SessionStorage(data_dir=data_dir)
+        for i in range(5):
+            writer.save_session(f"s{i}")
+
+        expected = ["s4", "s3", "s2"]
+        assert writer.get_session_ids() == expected
+        assert SessionStorage(data_dir=data_dir).get_session_ids() == expected
+
+    def test_update_at_capacity_does_not_evict(self, data_dir, small_limits):
+        """Test that updating an existing session never evicts another."""
+        writer = SessionStorage(data_dir=data_dir)
+        for i in range(3):
+            writer.save_session(f"s{i}")
+        writer.update_session("s0", turn_count=7)
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == ["s2", "s1", "s0"]
+        assert reader.get_session("s0").turn_count == 7
+
+
+class TestSessionLogCompaction:
+    """Tests for folding the log back into a snapshot."""
+
+    def test_compaction_after_threshold(self, data_dir, sessions_file, small_limits):
+        """Test that crossing COMPACT_THRESHOLD rewrites a plain snapshot."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1")
+        for turn in range(1, 5):
+            store.update_session("s1", turn_count=turn)
+        # Five records so far: still at the threshold, not over it
+        assert len(read_log_lines(sessions_file)) == 5
+
+        store.update_session("s1", turn_count=5)
+
+        snapshot = json.loads(sessions_file.read_text())
+        assert [s["session_id"] for s in snapshot] == ["s1"]
+        assert snapshot[0]["turn_count"] == 5
+        assert store._log_records == 0
+
+    def test_compacted_file_replays_identically(self, data_dir, small_limits):
+        """Test that sessions survive compaction unchanged."""
+        store = SessionStorage(data_dir=data_dir)
+        for i in range(4):
+            store.save_session(f"s{i}", first_message=f"m{i}")
+        store.delete_session("s2")
+        store.update_session("s1", name="kept")
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == store.get_session_ids()
+        assert reader.get_session("s1").name == "kept"
+
+    def test_log_continues_after_compaction(self, data_dir, sessions_file, small_limits):
+        """Test that writes after a compaction append to the new snapshot."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1")
+        for turn in range(5):
+            store.update_session("s1", turn_count=turn)
+        assert read_log_lines(sessions_file) == []
+
+        store.save_session("s2")
+
+        assert read_log_lines(sessions_file)[-1]["session"]["session_id"] == "s2"
+        assert SessionStorage(data_dir=data_dir).get_session_ids() == ["s2", "s1"]
+
+
+class TestSessionLogRecovery:
+    """Tests for reading damaged or legacy storage files."""
+
+    def test_truncated_trailing_line_is_skipped(self, data_dir, sessions_file):
+        """Test that a partially written last record is ignored."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1")
+        with open(sessions_file, "a") as f:
+            f.write('{"op":"put","session":{"session_id":"s2"')
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == ["s1"]
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "not json",
+            '{"op":"put"}',
+            '{"session_id":"s1"}',
+            "[1, 2]",
+            '"text"',
+        ],
+    )
+    def test_corrupted_record_is_skipped(self, data_dir, sessions_file, line):
+        """Test that malformed records are skipped and later ones still apply."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1")
+        with open(sessions_file, "a") as f:
+            f.write(line + "\n")
+            f.write('{"op":"put","session":{"session_id":"s2"}}\n')
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == ["s2", "s1"]
+
+    def test_corrupted_snapshot_reinitializes(self, data_dir, sessions_file):
+        """Test that an unparseable snapshot resets the file to an empty array."""
+        sessions_file.parent.mkdir(parents=True)
+        sessions_file.write_text('[{"session_id": ')
+
+        reader = SessionStorage(data_dir=data_dir)
+        assert reader.get_session_ids() == []
+        assert json.loads(sessions_file.read_text()) == []
+
+    def test_legacy_plain_array_file(self, data_dir, sessions_file):
+        """Test that files written by the previous format load unchanged."""
+        legacy = [
+            {"session_id": "old1", "first_message": "a", "created_at": "2024-01-01T00:00:00",
+             "turn_count": 1, "user_id": None, "agent_id": None, "name": None},
+            {"session_id": "old2", "first_message": "b", "created_at": "2024-01-02T00:00:00",
+             "turn_count": 2, "user_id": "bob", "agent_id": None, "name": None},
+        ]
+        sessions_file.parent.mkdir(parents=True)
+        sessions_file.write_text(json.dumps(legacy, indent=2))
+
+        store = SessionStorage(data_dir=data_dir)
+        assert store.get_session_ids() == ["old2", "old1"]
+        assert store.get_session("old2").user_id == "bob"
+
+        # New writes append to the legacy snapshot
+        store.save_session("new1")
+        assert SessionStorage(data_dir=data_dir).get_session_ids() == ["new1", "old2", "old1"]
+
+
+class TestSharedSessionFile:
+    """Tests for several SessionStorage instances on the same file."""
+
+    def test_instances_see_each_others_appends(self, data_dir):
+        """Test that appends from one instance are visible to another."""
+        first = SessionStorage(data_dir=data_dir)
+        second = SessionStorage(data_dir=data_dir)
+
+        first.save_session("a1")
+        second.save_session("b1")
+        first.save_session("a2")
+
+        assert first.get_session_ids() == ["a2", "b1", "a1"]
+        assert second.get_session_ids() == ["a2", "b1", "a1"]
+
+    def test_own_append_keeps_cache_in_sync(self, data_dir):
+        """Test that an instance's own append does not force a re-read."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1")
+        cached = store._read_storage()
+
+        store.save_session("s2")
+
+        assert store._cache_dirty is False
+        assert store._read_storage() is cached
+
+    def test_foreign_append_during_batch_resyncs(self, data_dir):
+        """Test the resync path when another writer appends mid-batch.
+
+        The batching instance's cache misses the other record, so its
+        flush finds the file longer than its cache stamp and marks the
+        cache dirty instead of re-stamping it.
+        """
+        first = SessionStorage(data_dir=data_dir)
+        second = SessionStorage(data_dir=data_dir)
+
+        with first.batch():
+            first.save_session("a1")
+            second.save_session("b1")
+        assert first._cache_dirty is True
+
+        assert first.get_session_ids() == ["a1", "b1"]
+        assert SessionStorage(data_dir=data_dir).get_session_ids() == ["a1", "b1"]
+
+    def test_dirty_cache_compacts_from_disk(self, data_dir, sessions_file, small_limits):
+        """Test that an out-of-date instance compacts from the file, not its cache."""
+        first = SessionStorage(data_dir=data_dir)
+        second = SessionStorage(data_dir=data_dir)
+        first.save_session("a1")
+
+        with first.batch():
+            for turn in range(6):
+                first.update_session("a1", turn_count=turn)
+            second.save_session("b1")
+
+        # The log crossed the threshold while first's cache lacked b1
+        assert read_log_lines(sessions_file) == []
+        assert SessionStorage(data_dir=data_dir).get_session_ids() == ["b1", "a1"]
+
+    def test_interleaved_compactions_keep_records(self, data_dir, sessions_file, small_limits):
+        """Test that two instances compacting back to back lose nothing.
+
+        second appends (and compacts) between first's append and first's
+        compaction, so first must not snapshot its own cache over it.
+        """
+        first = SessionStorage(data_dir=data_dir)
+        second = SessionStorage(data_dir=data_dir)
+        for i in range(5):
+            first.save_session(f"a{i}")
+        second.load_sessions_raw()
+
+        compact = first._compact
+
+        def interleaved():
+            second.save_session("b1")
+            compact()
+
+        with patch.object(first, "_compact", interleaved):
+            first.save_session("a5")
+
+        assert read_log_lines(sessions_file) == []
+        assert SessionStorage(data_dir=data_dir).get_session_ids() == ["b1", "a5", "a4"]
+        assert first.get_session_ids() == ["b1", "a5", "a4"]
+
+    @pytest.mark.skipif(storage.fcntl is None, reason="fcntl not available")
+    def test_appends_share_lock_and_compaction_excludes(self, data_dir, small_limits):
+        """Test that appends take the shared lock and compaction the exclusive one."""
+        store = SessionStorage(data_dir=data_dir)
+        for i in range(5):
+            store.save_session(f"s{i}")
+
+        with patch.object(storage.fcntl, "flock") as mock_flock:
+            store.save_session("s5")
+
+        modes = [call.args[1] for call in mock_flock.call_args_list]
+        assert modes == [storage.fcntl.LOCK_SH, storage.fcntl.LOCK_EX]
+
+
+class TestSessionQueries:
+    """Tests for the memoized session query results."""
+
+    def test_sessions_by_user_are_not_shared(self, data_dir):
+        """Test that mutating a returned SessionData does not leak into the cache."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1", user_id="alice")
+        store.save_session("s2", user_id="bob")
+        store.save_session("s3", user_id="alice")
+
+        first = store.get_sessions_by_user("alice")
+        assert [s.session_id for s in first] == ["s3", "s1"]
+        first[0].turn_count = 99
+        first.pop()
+
+        second = store.get_sessions_by_user("alice")
+        assert [s.session_id for s in second] == ["s3", "s1"]
+        assert second[0].turn_count == 0
+        assert second[0] is not first[0]
+
+    def test_sessions_by_user_follow_updates(self, data_dir):
+        """Test that the memoized projection is dropped on change."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1", user_id="alice")
+        store.get_sessions_by_user("alice")
+
+        store.update_session("s1", turn_count=3)
+        store.save_session("s2", user_id="alice")
+
+        sessions = store.get_sessions_by_user("alice")
+        assert [s.session_id for s in sessions] == ["s2", "s1"]
+        assert sessions[1].turn_count == 3
+
+    def test_session_ids_are_not_shared(self, data_dir):
+        """Test that mutating a returned ID list does not affect the next call."""
+        store = SessionStorage(data_dir=data_dir)
+        store.save_session("s1", user_id="alice")
+
+        store.get_session_ids("alice").clear()
+
+        assert store.get_session_ids("alice") == ["s1"]
+
+
+class TestHistoryWriters:
+    """Tests for the per-session history handles."""
+
+    @pytest.fixture
+    def history(self, data_dir):
+        """Create a HistoryStorage and close its handles afterwards."""
+        history = HistoryStorage(data_dir=data_dir)
+        yield history
+        history.close()
+
+    def test_appends_are_visible_to_other_instances(self, data_dir, history):
+        """Test that another instance sees each message without flush()."""
+        reader = HistoryStorage(data_dir=data_dir)
+        history.append_message("s1", "user", "hello")
+
+        assert [m["content"] for m in reader.get_messages_dict("s1")] == ["hello"]
+
+        history.append_message("s1", "assistant", "hi")
+
+        assert reader.get_message_count("s1") == 2
+
+    def test_append_after_delete_by_other_instance(self, data_dir, history):
+        """Test that appends after a foreign delete go to a new, visible file."""
+        other = HistoryStorage(data_dir=data_dir)
+        history.append_message("s1", "user", "before delete")
+        old_writer = history._writers["s1"]
+
+        assert other.delete_history("s1") is True
+
+        history.append_message("s1", "user", "after delete")
+
+        assert old_writer.closed
+        assert [m["content"] for m in other.get_messages_dict("s1")] == ["after delete"]
+
+    def test_append_after_delete_and_recreate(self, data_dir, history):
+        """Test that a stale handle joins a file recreated by another instance."""
+        other = HistoryStorage(data_dir=data_dir)
+        history.append_message("s1", "user", "a")
+        other.delete_history("s1")
+        other.append_message("s1", "user", "b")
+
+        history.append_message("s1", "user", "c")
+
+        assert [m["content"] for m in other.get_messages_dict("s1")] == ["b", "c"]
+        other.close()
+
+    def test_one_handle_per_session(self, history):
+        """Test that appends to a session reuse a single open handle."""
+        history.append_message("s1", "user", "one")
+        writer = history._writers["s1"]
+        history.append_message("s1", "assistant", "two")
+        history.append_message("s2", "user", "other")
+
+        assert history._writers["s1"] is writer
+        assert set(history._writers) == {"s1", "s2"}
+
+    def test_buffer_size(self, history):
+        """Test that handles are opened with HISTORY_WRITE_BUFFER."""
+        with patch("builtins.open", wraps=open) as mock_open:
+            history.append_message("s1", "user", "hello")
+
+        assert mock_open.call_args.kwargs["buffering"] == storage.HISTORY_WRITE_BUFFER
+
+    def test_message_larger_than_buffer(self, data_dir, history):
+        """Test that a message larger than the buffer is stored intact."""
+        reader = HistoryStorage(data_dir=data_dir)
+        big = "x" * storage.HISTORY_WRITE_BUFFER
+        history.append_message("s1", "user", big)
+        history.append_message("s1", "user", "tail")
+
+        assert [m["content"] for m in reader.get_messages_dict("s1")] == [big, "tail"]
+
+    def test_own_reads_see_appends(self, history):
+        """Test that reads through the writing instance see its messages."""
+        history.append_message("s1", "user", "hello")
+
+        assert history.get_message_count("s1") == 1
+        assert history.get_messages("s1")[0].content == "hello"
+
+    def test_flush_all_sessions(self, data_dir, history):
+        """Test that flush() with no session flushes every open handle."""
+        reader = HistoryStorage(data_dir=data_dir)
+        history.append_message("s1", "user", "a")
+        history.append_message("s2", "user", "b")
+
+        history.flush()
+
+        assert reader.get_message_count("s1") == 1
+        assert reader.get_message_count("s2") == 1
+
+    def test_close_session_releases_handle(self, data_dir, history):
+        """Test that close(session_id) flushes and closes only that handle."""
+        reader = HistoryStorage(data_dir=data_dir)
+        history.append_message("s1", "user", "a")
+        history.append_message("s2", "user", "b")
+        writer = history._writers["s1"]
+
+        history.close("s1")
+
+        assert writer.closed
+        assert "s1" not in history._writers
+        assert "s2" in history._writers
+        assert reader.get_message_count("s1") == 1
+
+    def test_close_all_releases_handles(self, history):
+        """Test that close() releases every handle."""
+        history.append_message("s1", "user", "a")
+        history.append_message("s2", "user", "b")
+        writers = list(history._writers.values())
+
+        history.close()
+
+        assert history._writers == {}
+        assert all(writer.closed for writer in writers)
+
+    def test_append_after_close_reopens(self, data_dir, history):
+        """Test that a closed session can be appended to again."""
+        history.append_message("s1", "user", "a")
+        history.close("s1")
+        history.append_message("s1", "user", "b")
+        history.flush("s1")
+
+        reader = HistoryStorage(data_dir=data_dir)
+        assert [m["content"] for m in reader.get_messages_dict("s1")] == ["a", "b"]
+
+    def test_delete_history_closes_handle(self, history):
+        """Test that deleting a session's history closes its handle first."""
+        history.append_message("s1", "user", "a")
+        writer = history._writers["s1"]
+
+        assert history.delete_history("s1") is True
+        assert writer.closed
+        assert history.get_message_count("s1") == 0
+
+    def test_exit_handler_flushes_live_instances(self, data_dir):
+        """Test that the atexit hook flushes and closes open instances."""
+        history = HistoryStorage(data_dir=data_dir)
+        history.append_message("s1", "user", "pending")
+        assert history in storage._open_history_storages
+
+        storage._close_history_storages()
+
+        assert history._writers == {}
+        assert HistoryStorage(data_dir=data_dir).get_message_count("s1") == 1
+
+    def test_collected_instances_leave_registry(self, data_dir):
+        """Test that the registry does not keep instances alive."""
+        history = HistoryStorage(data_dir=data_dir)
+        before = len(storage._open_history_storages)
+
+        del history
+        gc.collect()
+
+        assert len(storage._open_history_storages) == before - 1
+
+    @pytest.mark.parametrize("sync_enabled", [True, False])
+    def test_history_fsync(self, history, monkeypatch, sync_enabled):
+        """Test that HISTORY_FSYNC syncs on flush() and close() only when set."""
+        monkeypatch.setattr(storage, "_SYNC_HISTORY", sync_enabled)
+        calls = []
+        monkeypatch.setattr(storage, "_fdatasync", calls.append)
+
+        history.append_message("s1", "user", "a")
+        history.append_message("s1", "user", "b")
+        assert calls == []
+
+        history.flush("s1")
+        history.close("s1")
+
+        assert len(calls) == (2 if sync_enabled else 0)
@@ -0,0 +1,173 @@
+"""Tests for agent.core.yaml_utils.
+
+Covers:
+- mtime-keyed caching in load_yaml_config
+- The opt-in pickle sidecar cache (AGENT_YAML_FAST_CACHE): hits, stale
+  sidecar cleanup and fallback to parsing when a sidecar is unreadable
+"""
+import os
+import pickle
+
+import pytest
+
+import agent.core.yaml_utils as yaml_utils
+from agent.core.yaml_utils import clear_yaml_cache, load_yaml_config
+
+
+def write_yaml(path, content, mtime_ns):
+    """Write a YAML file and pin its mtime."""
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def sidecars(directory, name="config.yaml"):
+    """Return the sidecar files for name in directory."""
+    return sorted(p.name for p in directory.glob(f"{name}.cache.*"))
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start and finish every test with an empty in-process cache."""
+    clear_yaml_cache()
+    yield
+    clear_yaml_cache()
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    """Create a YAML config file."""
+    path = tmp_path / "config.yaml"
+    write_yaml(path, "key: first\n", 1_000_000_000)
+    return path
+
+
+@pytest.fixture
+def fast_cache(monkeypatch):
+    """Enable the pickle sidecar cache next to the YAML file."""
+    monkeypatch.setattr(yaml_utils, "_FAST_CACHE_ENABLED", True)
+    monkeypatch.setattr(yaml_utils, "_FAST_CACHE_DIR", None)
+
+
+class TestLoadYamlConfig:
+    """Tests for the in-process cache."""
+
+    def test_missing_file_returns_empty_dict(self, tmp_path):
+        """Test that a missing file loads as {}."""
+        assert load_yaml_config(tmp_path / "missing.yaml") == {}
+
+    def test_empty_file_returns_empty_dict(self, tmp_path):
+        """Test that an empty file loads as {}."""
+        path = tmp_path / "empty.yaml"
+        path.write_text("")
+        assert load_yaml_config(path) == {}
+
+    def test_unchanged_file_is_cached(self, config_path):
+        """Test that repeated loads of an unchanged file reuse the parse."""
+        assert load_yaml_config(config_path) is load_yaml_config(config_path)
+
+    def test_modified_file_is_reparsed(self, config_path):
+        """Test that a new mtime produces a fresh parse."""
+        assert load_yaml_config(config_path) == {"key": "first"}
+        write_yaml(config_path, "key: second\n", 2_000_000_000)
+        assert load_yaml_config(config_path) == {"key": "second"}
+
+    def test_no_sidecar_without_opt_in(self, config_path, monkeypatch):
+        """Test that sidecars are only written when the fast cache is enabled."""
+        monkeypatch.setattr(yaml_utils, "_FAST_CACHE_ENABLED", False)
+        load_yaml_config(config_path)
+        assert sidecars(config_path.parent) == []
+
+
+class TestPickleSidecar:
+    """Tests for the AGENT_YAML_FAST_CACHE sidecar files."""
+
+    def test_sidecar_written_next_to_yaml(self, config_path, fast_cache):
+        """Test that the first parse writes one content-hashed sidecar."""
+        assert load_yaml_config(config_path) == {"key": "first"}
+
+        names = sidecars(config_path.parent)
+        assert len(names) == 1
+        with open(config_path.parent / names[0], "rb") as f:
+            assert pickle.load(f) == {"key": "first"}
+        assert not list(config_path.parent.glob("*.tmp"))
+
+    def test_sidecar_hit_skips_yaml_parsing(self, config_path, fast_cache, monkeypatch):
+        """Test that a fresh process reads the sidecar instead of parsing."""
+        load_yaml_config(config_path)
+        clear_yaml_cache()
+
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("YAML should not be parsed on a sidecar hit")
+
+        monkeypatch.setattr(yaml_utils.yaml, "load", fail_parse)
+        assert load_yaml_config(config_path) == {"key": "first"}
+
+    def test_sidecar_is_keyed_on_content(self, config_path, fast_cache):
+        """Test that a sidecar for the same content is reused across mtimes."""
+        load_yaml_config(config_path)
+        before = sidecars(config_path.parent)
+
+        # Touch without changing content: same hash, same sidecar
+        os.utime(config_path, ns=(3_000_000_000, 3_000_000_000))
+        load_yaml_config(config_path)
+
+        assert sidecars(config_path.parent) == before
+
+    def test_stale_sidecar_is_replaced(self, config_path, fast_cache):
+        """Test that editing the YAML deletes the old sidecar."""
+        load_yaml_config(config_path)
+        old = sidecars(config_path.parent)
+
+        write_yaml(config_path, "key: second\n", 2_000_000_000)
+        assert load_yaml_config(config_path) == {"key": "second"}
+
+        new = sidecars(config_path.parent)
+        assert len(new) == 1
+        assert new != old
+
+    def test_stale_sidecar_is_never_used(self, config_path, fast_cache):
+        """Test that a sidecar for other content is ignored even if present."""
+        load_yaml_config(config_path)
+        stale = config_path.parent / sidecars(config_path.parent)[0]
+        stale_bytes = stale.read_bytes()
+
+        write_yaml(config_path, "key: second\n", 2_000_000_000)
+        # Put the old sidecar back under its own (now wrong) name
+        stale.write_bytes(stale_bytes)
+        clear_yaml_cache()
+
+        assert load_yaml_config(config_path) == {"key": "second"}
+
+    @pytest.mark.parametrize(
+        "payload", [b"", b"not a pickle", pickle.dumps({"key": "x"})[:5]]
+    )
+    def test_unreadable_sidecar_falls_back_to_yaml(self, config_path, fast_cache, payload):
+        """Test that a corrupt or truncated sidecar is ignored and rewritten."""
+        load_yaml_config(config_path)
+        sidecar = config_path.parent / sidecars(config_path.parent)[0]
+        sidecar.write_bytes(payload)
+        clear_yaml_cache()
+
+        assert load_yaml_config(config_path) == {"key": "first"}
+        with open(sidecar, "rb") as f:
+            assert pickle.load(f) == {"key": "first"}
+
+    def test_cache_dir_override(self, config_path, tmp_path, monkeypatch):
+        """Test that AGENT_YAML_CACHE_DIR moves sidecars out of the config dir."""
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setattr(yaml_utils, "_FAST_CACHE_ENABLED", True)
+        monkeypatch.setattr(yaml_utils, "_FAST_CACHE_DIR", str(cache_dir))
+
+        assert load_yaml_config(config_path) == {"key": "first"}
+
+        assert sidecars(config_path.parent) == []
+        assert len(sidecars(cache_dir)) == 1
+
+    def test_unwritable_cache_dir_still_parses(self, config_path, tmp_path, monkeypatch):
+        """Test that failing to write a sidecar does not fail the load."""
+        blocker = tmp_path / "blocker"
+        blocker.write_text("a file, not a directory")
+        monkeypatch.setattr(yaml_utils, "_FAST_CACHE_ENABLED", True)
+        monkeypatch.setattr(yaml_utils, "_FAST_CACHE_DIR", str(blocker / "cache"))
+
+        assert load_yaml_config(config_path) == {"key": "first"}
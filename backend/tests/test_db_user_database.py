@@ -15,6 +15,7 @@ Uses in-memory SQLite database for isolation.
 
 import sqlite3
 import uuid
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -27,6 +28,8 @@ from api.db.user_database import (
     _get_connection,
     _get_database_path,
     _verify_password_hash,
+    authenticate,
+    close_db_connection,
     get_db_connection,
     get_user_by_username,
     hash_password,
@@ -194,6 +197,12 @@ class TestGetConnection:
 class TestGetDbConnection:
     """Test context manager for database connections."""
 
+    @pytest.fixture(autouse=True)
+    def _reset_pool(self):
+        close_db_connection()
+        yield
+        close_db_connection()
+
     @patch("api.db.user_database._get_connection")
     def test_get_db_connection_yields_connection(self, mock_get_conn):
         """Test that get_db_connection yields a valid connection."""
@@ -203,21 +212,50 @@ class TestGetDbConnection:
         with get_db_connection() as conn:
             assert conn is mock_conn
 
-        # Verify connection was closed
-        mock_conn.close.assert_called_once()
+        # Pooled connection stays open after the block
+        mock_conn.close.assert_not_called()
+
+    @patch("api.db.user_database._get_connection")
+    def test_get_db_connection_reuses_connection(self, mock_get_conn):
+        """Test that repeated use on one thread reuses the pooled connection."""
+        mock_get_conn.return_value = MagicMock(spec=sqlite3.Connection)
+
+        with get_db_connection() as first:
+            pass
+        with get_db_connection() as second:
+            pass
+
+        assert first is second
+        mock_get_conn.assert_called_once()
+
+    @patch("api.db.user_database._get_database_path")
+    def test_get_db_connection_reopens_for_new_path(self, mock_db_path, tmp_path):
+        """Test that a different database path gets a fresh connection."""
+        mock_db_path.return_value = tmp_path / "first.db"
+        with get_db_connection() as first:
+            pass
+
+        mock_db_path.return_value = tmp_path / "second.db"
+        with get_db_connection() as second:
+            pass
+
+        assert first is not second
+        with pytest.raises(sqlite3.ProgrammingError):
+            first.execute("SELECT 1")
 
     @patch("api.db.user_database._get_connection")
-    def test_get_db_connection_closes_on_exception(self, mock_get_conn):
-        """Test that connection is closed even when exception occurs."""
+    def test_get_db_connection_rolls_back_on_exception(self, mock_get_conn):
+        """Test that an open transaction is rolled back when an exception occurs."""
         mock_conn = MagicMock(spec=sqlite3.Connection)
+        mock_conn.in_transaction = True
         mock_get_conn.return_value = mock_conn
 
         with pytest.raises(ValueError):
             with get_db_connection() as _conn:
                 raise ValueError("Test error")
 
-        # Verify connection was still closed
-        mock_conn.close.assert_called_once()
+        mock_conn.rollback.assert_called_once()
+        mock_conn.close.assert_not_called()
 
 
 class TestInitDatabase:
@@ -894,6 +932,32 @@ class TestVerifyPassword:
 
         assert result is False
 
+    @patch("api.db.user_database._verify_password_hash")
+    @patch("api.db.user_database.get_user_by_username")
+    def test_verify_password_caches_recent_result(self, mock_get_user, mock_verify_hash):
+        """Test that a repeated login within the TTL skips bcrypt."""
+        mock_get_user.return_value = DbUser(
+            id="user123",
+            username="testuser",
+            password_hash="hash-a",
+            full_name=None,
+            role="user",
+            created_at=None,
+            last_login=None,
+            is_active=True,
+        )
+        mock_verify_hash.return_value = True
+
+        assert verify_password("testuser", "secret") is True
+        assert verify_password("testuser", "secret") is True
+        assert mock_verify_hash.call_count == 1
+
+        # A changed stored hash must not reuse the cached result
+        mock_get_user.return_value = replace(mock_get_user.return_value, password_hash="hash-b")
+        mock_verify_hash.return_value = False
+        assert verify_password("testuser", "secret") is False
+        assert mock_verify_hash.call_count == 2
+
 
 class TestUpdateLastLogin:
     """Test last login timestamp update."""
@@ -1029,6 +1093,65 @@ class TestUpdateLastLogin:
         conn.close()
 
 
+class TestAuthenticate:
+    """Test combined credential check and last-login update."""
+
+    @pytest.fixture
+    def db_file(self, tmp_path):
+        db_file = tmp_path / "test_authenticate.db"
+        with patch("api.db.user_database._get_database_path", return_value=db_file):
+            with patch("api.db.user_database._create_default_users"):
+                init_database()
+
+            conn = sqlite3.connect(str(db_file))
+            conn.execute(
+                """
+                INSERT INTO users (id, username, password_hash, full_name, role, created_at, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                ("active-id", "active", hash_password("secret"), None, "user", None, 1),
+            )
+            conn.execute(
+                """
+                INSERT INTO users (id, username, password_hash, full_name, role, created_at, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                ("inactive-id", "inactive", hash_password("secret"), None, "user", None, 0),
+            )
+            conn.commit()
+            conn.close()
+            yield db_file
+
+    @staticmethod
+    def _last_login(db_file, user_id):
+        conn = sqlite3.connect(str(db_file))
+        try:
+            return conn.execute(
+                "SELECT last_login FROM users WHERE id = ?", (user_id,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_authenticate_success_updates_last_login(self, db_file):
+        """Test that valid credentials return the user and record the login."""
+        user = authenticate("active", "secret")
+
+        assert user is not None
+        assert user.id == "active-id"
+        assert user.last_login is not None
+        assert self._last_login(db_file, "active-id") == user.last_login
+
+    @pytest.mark.parametrize(
+        "username,password",
+        [("active", "wrong"), ("inactive", "secret"), ("missing", "secret")],
+    )
+    def test_authenticate_failure_returns_none(self, db_file, username, password):
+        """Test that bad credentials, inactive and unknown users are rejected."""
+        assert authenticate(username, password) is None
+        assert self._last_login(db_file, "active-id") is None
+        assert self._last_login(db_file, "inactive-id") is None
+
+
 class TestDbUserDataclass:
     """Test DbUser dataclass."""
 
@@ -33,6 +33,17 @@ class TestGetCurrentUser:
         assert result.username == "testuser"
         assert result.role == "user"
 
+    @pytest.mark.asyncio
+    async def test_returns_prebuilt_payload_from_request_state(self):
+        """Test that a payload built by the middleware is returned as-is."""
+        payload = UserTokenPayload(user_id="user-123", username="testuser", role="user")
+        mock_request = MagicMock()
+        mock_request.state.user_payload = payload
+        mock_request.state.user = {"user_id": "other", "username": "other"}
+
+        assert await get_current_user(mock_request) is payload
+        assert await get_current_user_optional(mock_request) is payload
+
     @pytest.mark.asyncio
     async def test_returns_user_from_request_state_admin(self):
         """Test that admin role is correctly extracted."""
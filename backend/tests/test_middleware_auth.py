@@ -1,40 +1,68 @@
 """Tests for APIKeyMiddleware."""
 
 from unittest.mock import AsyncMock, MagicMock, patch
+import json
 import os
 
 import pytest
-from fastapi import Request
-from fastapi.responses import JSONResponse
 
 from api.middleware.auth import APIKeyMiddleware
+from api.models.user_auth import UserTokenPayload
 from api.services.token_service import TokenService
 
 
+def make_scope(
+    path="/api/v1/sessions",
+    method="GET",
+    headers=None,
+    client=("127.0.0.1", 50000),
+    query_string=b"",
+):
+    """Build an ASGI HTTP scope for the middleware under test."""
+    return {
+        "type": "http",
+        "path": path,
+        "method": method,
+        "query_string": query_string,
+        "headers": [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ],
+        "client": client,
+    }
+
+
+async def run_middleware(middleware, scope):
+    """Run the middleware on scope and return the (status, body) it sent."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+
+    status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return status, body
+
+
 @pytest.fixture
-def mock_request():
-    """Create a mock FastAPI request."""
-    request = MagicMock(spec=Request)
-    request.url = MagicMock()
-    request.url.path = "/api/v1/sessions"
-    request.method = "GET"
-    request.client = MagicMock()
-    request.client.host = "127.0.0.1"
-    request.headers = MagicMock()
-    request.headers.get = MagicMock(return_value=None)
-    # Use a simple object for state that doesn't auto-create attributes
-    from types import SimpleNamespace
-
-    request.state = SimpleNamespace()
-    return request
+def scope():
+    """Create an ASGI scope for a protected endpoint."""
+    return make_scope()
 
 
 @pytest.fixture
-def mock_call_next():
-    """Create a mock call_next function."""
-    mock_call = AsyncMock()
-    mock_call.return_value = MagicMock(status_code=200)
-    return mock_call
+def mock_app():
+    """Create a downstream ASGI app that responds with 200."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return AsyncMock(side_effect=app)
 
 
 @pytest.fixture
@@ -43,85 +71,85 @@ def mock_token_service():
     return MagicMock(spec=TokenService)
 
 
+@pytest.fixture
+def configured_api_key():
+    """Return a factory that sets API_KEY and reloads the middleware config."""
+    import importlib
+    import api.config
+    import api.middleware.auth
+
+    original_key = os.environ.get("API_KEY")
+
+    def configure(api_key):
+        if api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = api_key
+        importlib.reload(api.config)
+        importlib.reload(api.middleware.auth)
+
+    yield configure
+
+    if original_key is None:
+        os.environ.pop("API_KEY", None)
+    else:
+        os.environ["API_KEY"] = original_key
+    importlib.reload(api.config)
+    importlib.reload(api.middleware.auth)
+
+
 class TestAPIKeyMiddleware:
     """Test cases for APIKeyMiddleware public path skipping."""
 
     @pytest.fixture
-    def middleware(self, mock_token_service):
+    def middleware(self, mock_app, mock_token_service):
         """Create middleware instance with mocked token service."""
         with patch("api.middleware.auth.token_service", mock_token_service):
-            return APIKeyMiddleware(MagicMock())
+            return APIKeyMiddleware(mock_app)
 
     @pytest.mark.asyncio
-    async def test_public_path_root_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that root path skips authentication."""
-        mock_request.url.path = "/"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "/",
+            "/health",
+            "/api/v1/auth/ws-token",
+            "/api/v1/auth/ws-token-refresh",
+            "/api/v1/auth/login",
+        ],
+    )
+    async def test_public_path_skips_auth(self, middleware, mock_app, path):
+        """Test that public paths skip authentication."""
+        scope = make_scope(path=path)
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 200
+        mock_app.assert_called_once()
+        assert mock_app.call_args[0][0] is scope
 
     @pytest.mark.asyncio
-    async def test_public_path_health_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that health check path skips authentication."""
-        mock_request.url.path = "/health"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+    async def test_options_method_skips_auth(self, middleware, mock_app):
+        """Test that OPTIONS method (CORS preflight) skips authentication."""
+        status, _ = await run_middleware(middleware, make_scope(method="OPTIONS"))
+        assert status == 200
+        mock_app.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_public_path_ws_token_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that ws-token endpoint skips authentication."""
-        mock_request.url.path = "/api/v1/auth/ws-token"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+    async def test_options_with_non_public_path_skips_auth(self, middleware, mock_app):
+        """Test that OPTIONS method skips auth even on protected paths."""
+        scope = make_scope(path="/api/v1/sessions", method="OPTIONS")
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 200
+        mock_app.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_public_path_ws_token_refresh_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that ws-token-refresh endpoint skips authentication."""
-        mock_request.url.path = "/api/v1/auth/ws-token-refresh"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+    async def test_non_http_scope_passes_through(self, middleware, mock_app):
+        """Test that WebSocket and lifespan scopes are passed through untouched."""
+        scope = {"type": "websocket", "path": "/api/v1/ws/chat", "headers": []}
+        receive, send = AsyncMock(), AsyncMock()
 
-    @pytest.mark.asyncio
-    async def test_public_path_login_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that login endpoint skips authentication."""
-        mock_request.url.path = "/api/v1/auth/login"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+        await middleware(scope, receive, send)
 
-    @pytest.mark.asyncio
-    async def test_options_method_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that OPTIONS method (CORS preflight) skips authentication."""
-        mock_request.method = "OPTIONS"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
-
-    @pytest.mark.asyncio
-    async def test_options_with_non_public_path_skips_auth(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that OPTIONS method skips auth even on protected paths."""
-        mock_request.method = "OPTIONS"
-        mock_request.url.path = "/api/v1/sessions"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+        mock_app.assert_called_once_with(scope, receive, send)
 
 
 class TestAPIKeyMiddlewareWithAPIKey:
@@ -133,115 +161,98 @@ class TestAPIKeyMiddlewareWithAPIKey:
         return "test-valid-api-key-12345"
 
     @pytest.fixture
-    def middleware(self, api_key, mock_token_service):
+    def middleware(self, api_key, configured_api_key, mock_app, mock_token_service):
         """Create middleware instance with API key set using environment variable."""
-        # Set environment variable before middleware creation
-        original_key = os.environ.get("API_KEY")
-        os.environ["API_KEY"] = api_key
-        # Reload the config module to pick up new env var
-        import importlib
-        import api.config
-        import api.middleware.auth
-
-        importlib.reload(api.config)
-        importlib.reload(api.middleware.auth)
-
-        try:
-            with patch("api.middleware.auth.token_service", mock_token_service):
-                yield APIKeyMiddleware(MagicMock())
-        finally:
-            # Restore original value
-            if original_key is None:
-                os.environ.pop("API_KEY", None)
-            else:
-                os.environ["API_KEY"] = original_key
-            importlib.reload(api.config)
-            importlib.reload(api.middleware.auth)
+        configured_api_key(api_key)
+        with patch("api.middleware.auth.token_service", mock_token_service):
+            yield APIKeyMiddleware(mock_app)
 
     @pytest.mark.asyncio
-    async def test_valid_api_key_accepted(
-        self, middleware, mock_request, mock_call_next, api_key
-    ):
+    async def test_valid_api_key_accepted(self, middleware, mock_app, api_key):
         """Test that valid API key is accepted."""
-        mock_request.headers.get.return_value = api_key
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+        scope = make_scope(headers={"X-API-Key": api_key})
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 200
+        mock_app.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_invalid_api_key_rejected(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_invalid_api_key_rejected(self, middleware, mock_app):
         """Test that invalid API key is rejected with 401."""
-        mock_request.headers.get.return_value = "wrong-api-key"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert isinstance(response, JSONResponse)
-        assert response.status_code == 401
-        mock_call_next.assert_not_called()
+        scope = make_scope(headers={"X-API-Key": "wrong-api-key"})
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 401
+        mock_app.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_missing_api_key_rejected(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_missing_api_key_rejected(self, middleware, mock_app, scope):
         """Test that missing API key is rejected with 401."""
-        mock_request.headers.get.return_value = None
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert isinstance(response, JSONResponse)
-        assert response.status_code == 401
-        mock_call_next.assert_not_called()
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 401
+        mock_app.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_empty_api_key_rejected(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_empty_api_key_rejected(self, middleware, mock_app):
         """Test that empty API key is rejected with 401."""
-        mock_request.headers.get.return_value = ""
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert isinstance(response, JSONResponse)
-        assert response.status_code == 401
-        mock_call_next.assert_not_called()
+        scope = make_scope(headers={"X-API-Key": ""})
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 401
+        mock_app.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_api_key_from_query_param_ignored(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_api_key_from_query_param_ignored(self, middleware, mock_app):
         """Test that API key from query params is ignored (security feature)."""
-        mock_request.headers.get.return_value = None
-        mock_request.url.path = "/api/v1/sessions?X-API-Key=test-key"
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert isinstance(response, JSONResponse)
-        assert response.status_code == 401
-        mock_call_next.assert_not_called()
+        scope = make_scope(query_string=b"X-API-Key=test-key")
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 401
+        mock_app.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_error_response_content(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_error_response_content(self, middleware, scope):
         """Test that error response has correct content."""
-        mock_request.headers.get.return_value = None
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert isinstance(response, JSONResponse)
-        assert response.status_code == 401
-        import json
+        status, body = await run_middleware(middleware, scope)
+        assert status == 401
+        assert json.loads(body)["detail"] == "Invalid or missing API key"
+
+    @pytest.mark.asyncio
+    async def test_error_response_matches_json_response(self, middleware, scope):
+        """Test that the cached 401 is byte-identical to a JSONResponse."""
+        from fastapi.responses import JSONResponse
+
+        expected = JSONResponse(
+            status_code=401, content={"detail": "Invalid or missing API key"}
+        )
+        messages = []
+
+        async def send(message):
+            messages.append(message)
 
-        body = json.loads(response.body.decode())
-        assert body["detail"] == "Invalid or missing API key"
+        await middleware(scope, AsyncMock(), send)
+
+        assert messages[0]["status"] == 401
+        assert sorted(messages[0]["headers"]) == sorted(expected.raw_headers)
+        assert messages[1]["body"] == expected.body
 
     @pytest.mark.asyncio
-    async def test_timing_safe_comparison_used(
-        self, middleware, mock_request, mock_call_next, api_key
-    ):
+    async def test_header_name_lookup_is_case_insensitive(self, middleware, mock_app, api_key):
+        """Test that the X-API-Key header is matched regardless of case."""
+        scope = make_scope(headers={"x-api-key": api_key})
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 200
+        mock_app.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_timing_safe_comparison_used(self, middleware, api_key):
         """Test that timing-safe comparison is used for key validation."""
-        mock_request.headers.get.return_value = api_key
+        scope = make_scope(headers={"X-API-Key": api_key})
         with patch("api.middleware.auth.secrets.compare_digest") as mock_compare:
             mock_compare.return_value = True
-            response = await middleware.dispatch(mock_request, mock_call_next)
-            assert response.status_code == 200
-            # Verify compare_digest was called with the expected key
+            status, _ = await run_middleware(middleware, scope)
+            assert status == 200
+            # Verify compare_digest was called bytes-to-bytes with the expected key
             assert mock_compare.called
             call_args = mock_compare.call_args[0]
-            assert call_args[0] == api_key
-            assert call_args[1] == api_key
+            assert call_args[0] == api_key.encode()
+            assert call_args[1] == api_key.encode()
 
 
 class TestAPIKeyMiddlewareUserToken:
@@ -253,200 +264,131 @@ class TestAPIKeyMiddlewareUserToken:
         return "test-api-key"
 
     @pytest.fixture
-    def middleware(self, api_key, mock_token_service):
+    def middleware(self, api_key, configured_api_key, mock_app, mock_token_service):
         """Create middleware instance with API key and token service."""
-        original_key = os.environ.get("API_KEY")
-        os.environ["API_KEY"] = api_key
-        import importlib
-        import api.config
-        import api.middleware.auth
-
-        importlib.reload(api.config)
-        importlib.reload(api.middleware.auth)
+        configured_api_key(api_key)
+        with patch("api.middleware.auth.token_service", mock_token_service):
+            yield APIKeyMiddleware(mock_app)
 
-        try:
-            with patch("api.middleware.auth.token_service", mock_token_service):
-                yield APIKeyMiddleware(MagicMock())
-        finally:
-            if original_key is None:
-                os.environ.pop("API_KEY", None)
-            else:
-                os.environ["API_KEY"] = original_key
-            importlib.reload(api.config)
-            importlib.reload(api.middleware.auth)
+    @pytest.fixture
+    def token_scope(self, api_key):
+        """Create a scope carrying both the API key and a user token."""
+        return make_scope(headers={"X-API-Key": api_key, "X-User-Token": "valid.jwt.token"})
 
     @pytest.mark.asyncio
     async def test_valid_user_token_populates_state(
-        self, middleware, mock_request, mock_call_next, api_key, mock_token_service
+        self, middleware, token_scope, mock_token_service
     ):
         """Test that valid X-User-Token populates request.state.user."""
-        user_token = "valid.jwt.token"
-        payload = {
+        mock_token_service.decode_token_any_type.return_value = {
             "username": "testuser",
             "user_id": "user-123",
             "role": "admin",
             "full_name": "Test User",
         }
-
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
-        mock_token_service.decode_token_any_type.return_value = payload
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        assert response.status_code == 200
-        assert hasattr(mock_request.state, "user")
-        assert mock_request.state.user["username"] == "testuser"
-        assert mock_request.state.user["user_id"] == "user-123"
-        assert mock_request.state.user["role"] == "admin"
-        assert mock_request.state.user["full_name"] == "Test User"
+        status, _ = await run_middleware(middleware, token_scope)
+
+        assert status == 200
+        state = token_scope["state"]
+        assert state["user"]["username"] == "testuser"
+        assert state["user"]["user_id"] == "user-123"
+        assert state["user"]["role"] == "admin"
+        assert state["user"]["full_name"] == "Test User"
+        assert state["user_payload"] == UserTokenPayload(
+            user_id="user-123", username="testuser", role="admin"
+        )
+        mock_token_service.decode_token_any_type.assert_called_once_with("valid.jwt.token")
 
     @pytest.mark.asyncio
     async def test_user_token_fallback_to_sub_for_user_id(
-        self, middleware, mock_request, mock_call_next, api_key, mock_token_service
+        self, middleware, token_scope, mock_token_service
     ):
         """Test that user_id falls back to 'sub' field if 'user_id' not present."""
-        user_token = "valid.jwt.token"
-        payload = {
+        mock_token_service.decode_token_any_type.return_value = {
             "username": "testuser",
             "sub": "sub-456",
             "role": "user",
             "full_name": "Test User",
         }
+        status, _ = await run_middleware(middleware, token_scope)
 
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
-        mock_token_service.decode_token_any_type.return_value = payload
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        assert response.status_code == 200
-        assert mock_request.state.user["user_id"] == "sub-456"
+        assert status == 200
+        assert token_scope["state"]["user"]["user_id"] == "sub-456"
 
     @pytest.mark.asyncio
     async def test_user_token_defaults_for_optional_fields(
-        self, middleware, mock_request, mock_call_next, api_key, mock_token_service
+        self, middleware, token_scope, mock_token_service
     ):
         """Test that optional fields have default values."""
-        user_token = "valid.jwt.token"
-        payload = {"username": "testuser"}
-
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
-        mock_token_service.decode_token_any_type.return_value = payload
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        mock_token_service.decode_token_any_type.return_value = {"username": "testuser"}
+        status, _ = await run_middleware(middleware, token_scope)
 
-        assert response.status_code == 200
-        assert mock_request.state.user["username"] == "testuser"
-        assert mock_request.state.user["user_id"] is None
-        assert mock_request.state.user["role"] == "user"
-        assert mock_request.state.user["full_name"] == ""
+        assert status == 200
+        user = token_scope["state"]["user"]
+        assert user["username"] == "testuser"
+        assert user["user_id"] is None
+        assert user["role"] == "user"
+        assert user["full_name"] == ""
 
     @pytest.mark.asyncio
     async def test_missing_username_skips_user_population(
-        self, middleware, mock_request, mock_call_next, api_key, mock_token_service
+        self, middleware, token_scope, mock_token_service
     ):
         """Test that missing username in token skips user population."""
-        user_token = "valid.jwt.token"
-        payload = {"user_id": "user-123"}
+        mock_token_service.decode_token_any_type.return_value = {"user_id": "user-123"}
+        status, _ = await run_middleware(middleware, token_scope)
 
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
-        mock_token_service.decode_token_any_type.return_value = payload
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        assert response.status_code == 200
+        assert status == 200
         # state.user should not be populated without username
-        assert not hasattr(mock_request.state, "user")
+        assert "user" not in token_scope.get("state", {})
 
     @pytest.mark.asyncio
     async def test_invalid_user_token_does_not_fail_request(
-        self, middleware, mock_request, mock_call_next, api_key, mock_token_service
+        self, middleware, mock_app, token_scope, mock_token_service
     ):
         """Test that invalid user token doesn't fail the request."""
-        user_token = "invalid.jwt.token"
-
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
         mock_token_service.decode_token_any_type.return_value = None
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        status, _ = await run_middleware(middleware, token_scope)
 
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+        assert status == 200
+        mock_app.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_user_token_decode_exception_does_not_fail_request(
-        self, middleware, mock_request, mock_call_next, api_key, mock_token_service
+        self, middleware, token_scope, mock_token_service
     ):
         """Test that exception during token decode doesn't fail the request."""
-        user_token = "malformed.token"
-
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
         mock_token_service.decode_token_any_type.side_effect = Exception("Decode error")
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        status, _ = await run_middleware(middleware, token_scope)
 
-        assert response.status_code == 200
+        assert status == 200
 
     @pytest.mark.asyncio
-    async def test_no_user_token_header_proceeds_normally(
-        self, middleware, mock_request, mock_call_next, api_key
-    ):
+    async def test_no_user_token_header_proceeds_normally(self, middleware, api_key):
         """Test that request without X-User-Token proceeds normally."""
+        scope = make_scope(headers={"X-API-Key": api_key})
+        status, _ = await run_middleware(middleware, scope)
 
-        def mock_get_header(key):
-            return {"X-API-Key": api_key}.get(key, None)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
-        response = await middleware.dispatch(mock_request, mock_call_next)
-
-        assert response.status_code == 200
+        assert status == 200
         # state.user should not be populated
-        assert not hasattr(mock_request.state, "user")
+        assert "user" not in scope.get("state", {})
 
 
 class TestAPIKeyMiddlewareNoAPIKey:
     """Test cases for APIKeyMiddleware when API_KEY is not configured."""
 
     @pytest.fixture
-    def middleware(self):
+    def middleware(self, configured_api_key, mock_app):
         """Create middleware instance with no API key configured."""
-        original_key = os.environ.get("API_KEY")
-        os.environ.pop("API_KEY", None)
-        import importlib
-        import api.config
-        import api.middleware.auth
-
-        importlib.reload(api.config)
-        importlib.reload(api.middleware.auth)
-
-        try:
-            yield APIKeyMiddleware(MagicMock())
-        finally:
-            if original_key is not None:
-                os.environ["API_KEY"] = original_key
-                importlib.reload(api.config)
-                importlib.reload(api.middleware.auth)
+        configured_api_key(None)
+        return APIKeyMiddleware(mock_app)
 
     @pytest.mark.asyncio
-    async def test_no_api_key_allows_all_requests(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_no_api_key_allows_all_requests(self, middleware, mock_app, scope):
         """Test that when no API key is configured, all requests proceed."""
-        mock_request.headers.get.return_value = None
-        response = await middleware.dispatch(mock_request, mock_call_next)
-        assert response.status_code == 200
-        mock_call_next.assert_called_once_with(mock_request)
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 200
+        mock_app.assert_called_once()
 
 
 class TestAPIKeyMiddlewareLogging:
@@ -458,39 +400,20 @@ class TestAPIKeyMiddlewareLogging:
         return "test-api-key"
 
     @pytest.fixture
-    def middleware(self, api_key):
+    def middleware(self, api_key, configured_api_key, mock_app):
         """Create middleware instance."""
-        original_key = os.environ.get("API_KEY")
-        os.environ["API_KEY"] = api_key
-        import importlib
-        import api.config
-        import api.middleware.auth
-
-        importlib.reload(api.config)
-        importlib.reload(api.middleware.auth)
-
-        try:
-            yield APIKeyMiddleware(MagicMock())
-        finally:
-            if original_key is None:
-                os.environ.pop("API_KEY", None)
-            else:
-                os.environ["API_KEY"] = original_key
-            importlib.reload(api.config)
-            importlib.reload(api.middleware.auth)
+        configured_api_key(api_key)
+        return APIKeyMiddleware(mock_app)
 
     @pytest.mark.asyncio
-    async def test_auth_failure_logs_client_ip_and_path(
-        self, middleware, mock_request, mock_call_next, caplog
-    ):
+    async def test_auth_failure_logs_client_ip_and_path(self, middleware, caplog):
         """Test that auth failure logs client IP and path."""
         import logging
 
-        mock_request.client.host = "192.168.1.100"
-        mock_request.headers.get.return_value = None
+        scope = make_scope(client=("192.168.1.100", 50000))
 
         with caplog.at_level(logging.WARNING):
-            await middleware.dispatch(mock_request, mock_call_next)
+            await run_middleware(middleware, scope)
 
         assert any(
             "Authentication failed" in record.message
@@ -500,111 +423,52 @@ class TestAPIKeyMiddlewareLogging:
         )
 
     @pytest.mark.asyncio
-    async def test_auth_failure_logs_unknown_client_ip(
-        self, mock_request, mock_call_next, caplog
-    ):
+    async def test_auth_failure_logs_unknown_client_ip(self, middleware, caplog):
         """Test that auth failure logs 'unknown' when client IP is not available."""
         import logging
 
-        request = MagicMock(spec=Request)
-        request.url = MagicMock()
-        request.url.path = "/api/v1/sessions"
-        request.method = "GET"
-        request.client = None
-        request.headers = MagicMock()
-        request.headers.get = MagicMock(return_value=None)
-        request.state = MagicMock()
+        scope = make_scope(client=None)
 
-        original_key = os.environ.get("API_KEY")
-        os.environ["API_KEY"] = "test-api-key"
-        import importlib
-        import api.config
-
-        importlib.reload(api.config)
-
-        try:
-            middleware = APIKeyMiddleware(MagicMock())
-
-            with caplog.at_level(logging.WARNING):
-                await middleware.dispatch(request, mock_call_next)
+        with caplog.at_level(logging.WARNING):
+            await run_middleware(middleware, scope)
 
-            assert any(
-                "Authentication failed" in record.message
-                and "client_ip=unknown" in record.message
-                for record in caplog.records
-            )
-        finally:
-            if original_key is None:
-                os.environ.pop("API_KEY", None)
-            else:
-                os.environ["API_KEY"] = original_key
-            importlib.reload(api.config)
+        assert any(
+            "Authentication failed" in record.message
+            and "client_ip=unknown" in record.message
+            for record in caplog.records
+        )
 
     @pytest.mark.asyncio
-    async def test_auth_failure_never_logs_actual_key(
-        self, middleware, mock_request, mock_call_next, caplog
-    ):
+    async def test_auth_failure_never_logs_actual_key(self, middleware, caplog):
         """Test that auth failure NEVER logs the actual API key."""
         import logging
 
         invalid_key = "my-secret-api-key-12345"
-        mock_request.headers.get.return_value = invalid_key
+        scope = make_scope(headers={"X-API-Key": invalid_key})
 
         with caplog.at_level(logging.WARNING):
-            await middleware.dispatch(mock_request, mock_call_next)
+            await run_middleware(middleware, scope)
 
         assert not any(invalid_key in record.message for record in caplog.records)
 
     @pytest.mark.asyncio
-    async def test_user_token_decode_failure_logs_debug(
-        self, mock_request, mock_call_next, caplog
-    ):
+    async def test_user_token_decode_failure_logs_debug(self, middleware, api_key, caplog):
         """Test that user token decode failure logs at debug level."""
         import logging
 
-        api_key = "test-api-key"
-        user_token = "invalid.token"
-
-        def mock_get_header(key):
-            return {"X-API-Key": api_key, "X-User-Token": user_token}.get(key)
-
-        mock_request.headers.get = MagicMock(side_effect=mock_get_header)
+        scope = make_scope(headers={"X-API-Key": api_key, "X-User-Token": "invalid.token"})
+        mock_token_service = MagicMock()
+        mock_token_service.decode_token_any_type.side_effect = Exception("Decode failed")
 
-        original_key = os.environ.get("API_KEY")
-        os.environ["API_KEY"] = api_key
-        import importlib
-        import api.config
-        import api.middleware.auth
-
-        importlib.reload(api.config)
-        importlib.reload(api.middleware.auth)
+        with patch("api.middleware.auth.token_service", mock_token_service):
+            with caplog.at_level(logging.DEBUG):
+                status, _ = await run_middleware(middleware, scope)
 
-        try:
-            # Create mock token service
-            mock_token_service = MagicMock()
-            mock_token_service.decode_token_any_type.side_effect = Exception(
-                "Decode failed"
-            )
-
-            # Patch token_service before creating middleware
-            with patch("api.middleware.auth.token_service", mock_token_service):
-                middleware = APIKeyMiddleware(MagicMock())
-
-                with caplog.at_level(logging.DEBUG):
-                    response = await middleware.dispatch(mock_request, mock_call_next)
-
-                assert response.status_code == 200
-                assert any(
-                    "Failed to decode user token" in record.message
-                    for record in caplog.records
-                )
-        finally:
-            if original_key is None:
-                os.environ.pop("API_KEY", None)
-            else:
-                os.environ["API_KEY"] = original_key
-            importlib.reload(api.config)
-            importlib.reload(api.middleware.auth)
+        assert status == 200
+        assert any(
+            "Failed to decode user token" in record.message
+            for record in caplog.records
+        )
 
 
 class TestAPIKeyMiddlewareTimingSafeComparison:
@@ -616,75 +480,64 @@ class TestAPIKeyMiddlewareTimingSafeComparison:
         return "test-api-key-12345"
 
     @pytest.fixture
-    def middleware(self, api_key):
+    def middleware(self, api_key, configured_api_key, mock_app):
         """Create middleware instance."""
-        original_key = os.environ.get("API_KEY")
-        os.environ["API_KEY"] = api_key
-        import importlib
-        import api.config
-        import api.middleware.auth
-
-        importlib.reload(api.config)
-        importlib.reload(api.middleware.auth)
-
-        try:
-            yield APIKeyMiddleware(MagicMock())
-        finally:
-            if original_key is None:
-                os.environ.pop("API_KEY", None)
-            else:
-                os.environ["API_KEY"] = original_key
-            importlib.reload(api.config)
-            importlib.reload(api.middleware.auth)
+        configured_api_key(api_key)
+        return APIKeyMiddleware(mock_app)
 
     @pytest.mark.asyncio
-    async def test_compare_digest_called_with_correct_args(
-        self, middleware, mock_request, mock_call_next, api_key
-    ):
+    async def test_compare_digest_called_with_correct_args(self, middleware, api_key):
         """Test that secrets.compare_digest is called with correct arguments."""
         provided_key = "test-api-key-12345"
-        mock_request.headers.get.return_value = provided_key
+        scope = make_scope(headers={"X-API-Key": provided_key})
 
         with patch("api.middleware.auth.secrets.compare_digest") as mock_compare:
             mock_compare.return_value = True
-            await middleware.dispatch(mock_request, mock_call_next)
+            await run_middleware(middleware, scope)
             # Verify compare_digest was called
             assert mock_compare.called
             call_args = mock_compare.call_args[0]
-            assert call_args[0] == provided_key
-            assert call_args[1] == api_key
+            assert call_args[0] == provided_key.encode()
+            assert call_args[1] == api_key.encode()
 
     @pytest.mark.asyncio
-    async def test_compare_digest_false_returns_401(
-        self, middleware, mock_request, mock_call_next
-    ):
+    async def test_non_ascii_key_compared_as_bytes(self, configured_api_key, mock_app):
+        """Test that a non-ASCII key is compared without a str TypeError."""
+        from api.middleware.auth import APIKeyMiddleware
+
+        configured_api_key("clé-secrète")
+        middleware = APIKeyMiddleware(mock_app)
+        scope = make_scope()
+        scope["headers"] = [(b"x-api-key", "clé-secrète".encode("utf-8"))]
+
+        status, _ = await run_middleware(middleware, scope)
+        assert status == 200
+
+    @pytest.mark.asyncio
+    async def test_compare_digest_false_returns_401(self, middleware):
         """Test that compare_digest returning False results in 401."""
-        mock_request.headers.get.return_value = "wrong-key"
+        scope = make_scope(headers={"X-API-Key": "wrong-key"})
 
         with patch("api.middleware.auth.secrets.compare_digest") as mock_compare:
             mock_compare.return_value = False
-            response = await middleware.dispatch(mock_request, mock_call_next)
-            assert response.status_code == 401
+            status, _ = await run_middleware(middleware, scope)
+            assert status == 401
 
     @pytest.mark.asyncio
-    async def test_none_key_short_circuits_compare_digest(
-        self, middleware, mock_request, mock_call_next
-    ):
-        """Test that None provided key short-circuits compare_digest."""
-        mock_request.headers.get.return_value = None
-
-        with patch("api.middleware.auth.secrets.compare_digest"):
-            response = await middleware.dispatch(mock_request, mock_call_next)
-            assert response.status_code == 401
+    async def test_none_key_short_circuits_compare_digest(self, middleware, scope):
+        """Test that a missing key short-circuits compare_digest."""
+        with patch("api.middleware.auth.secrets.compare_digest") as mock_compare:
+            status, _ = await run_middleware(middleware, scope)
+            assert status == 401
+            mock_compare.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_empty_string_treated_as_missing_key(
-        self, middleware, mock_request, mock_call_next, api_key
-    ):
+    async def test_empty_string_treated_as_missing_key(self, middleware):
         """Test that empty string is treated as missing key (falsy value)."""
-        mock_request.headers.get.return_value = ""
+        scope = make_scope(headers={"X-API-Key": ""})
 
-        with patch("api.middleware.auth.secrets.compare_digest"):
-            response = await middleware.dispatch(mock_request, mock_call_next)
+        with patch("api.middleware.auth.secrets.compare_digest") as mock_compare:
+            status, _ = await run_middleware(middleware, scope)
             # Empty string is falsy, so compare_digest should not be called due to short-circuit
-            assert response.status_code == 401
+            assert status == 401
+            mock_compare.assert_not_called()
@@ -991,3 +991,38 @@ class TestEdgeCases:
 
                 assert text_event["event"] == EventType.TEXT_DELTA
                 mock_convert.assert_called()
+
+
+class TestEncodeSSEFrames:
+    """Test _encode_sse_frames pre-encoding of SSE events."""
+
+    @staticmethod
+    async def _collect(events):
+        from api.routers.conversations import _encode_sse_frames
+
+        async def source():
+            for event in events:
+                yield event
+
+        return [frame async for frame in _encode_sse_frames(source())]
+
+    @pytest.mark.asyncio
+    async def test_matches_sse_starlette_encoding(self):
+        """Test that known events encode to the same bytes as sse-starlette."""
+        from sse_starlette.sse import ServerSentEvent
+
+        data = json.dumps({"text": "Hello"})
+        frames = await self._collect([{"event": EventType.TEXT_DELTA, "data": data}])
+
+        expected = ServerSentEvent(data=data, event="text_delta", sep="\r\n").encode()
+        assert frames == [expected]
+
+    @pytest.mark.asyncio
+    async def test_passes_through_unknown_or_multiline_events(self):
+        """Test that events it cannot pre-encode are left to sse-starlette."""
+        unknown = {"event": "sdk_session_id", "data": "{}"}
+        multiline = {"event": EventType.TEXT_DELTA, "data": "a\nb"}
+
+        frames = await self._collect([unknown, multiline])
+
+        assert frames == [unknown, multiline]
@@ -12,6 +12,7 @@ Tests all session management endpoints including:
 - POST /sessions/{id}/resume - Resume specific session
 """
 
+from dataclasses import asdict
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -441,7 +442,7 @@ class TestListSessions:
     async def test_list_sessions_empty(self, client, user_auth_headers):
         """Test listing sessions when none exist."""
         mock_session_storage = MagicMock()
-        mock_session_storage.load_sessions = MagicMock(return_value=[])
+        mock_session_storage.load_sessions_raw = MagicMock(return_value=[])
 
         with patch(
             "api.routers.sessions.get_user_session_storage",
@@ -480,7 +481,9 @@ class TestListSessions:
         ]
 
         mock_session_storage = MagicMock()
-        mock_session_storage.load_sessions = MagicMock(return_value=sessions)
+        mock_session_storage.load_sessions_raw = MagicMock(
+            return_value=[asdict(session) for session in sessions]
+        )
 
         with patch(
             "api.routers.sessions.get_user_session_storage",
@@ -499,6 +502,30 @@ class TestListSessions:
             assert data[1]["session_id"] == "session-2"
             assert data[1]["name"] is None
 
+    @pytest.mark.asyncio
+    async def test_list_sessions_missing_created_at(self, client, user_auth_headers):
+        """Test that a stored row without created_at still lists."""
+        mock_session_storage = MagicMock()
+        mock_session_storage.load_sessions_raw = MagicMock(
+            return_value=[{"session_id": "legacy-session", "turn_count": 2}]
+        )
+
+        with patch(
+            "api.routers.sessions.get_user_session_storage",
+            return_value=mock_session_storage,
+        ):
+            response = client.get(
+                "/api/v1/sessions",
+                headers=user_auth_headers,
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            data = response.json()
+            assert len(data) == 1
+            assert data[0]["session_id"] == "legacy-session"
+            assert data[0]["turn_count"] == 2
+            assert data[0]["created_at"]
+
     @pytest.mark.asyncio
     async def test_list_sessions_no_auth(self, client, auth_headers):
         """Test that listing sessions without user auth fails."""
@@ -758,7 +785,7 @@ class TestPerUserIsolation:
         # In a real scenario, different users would get different storage instances
 
         mock_session_storage = MagicMock()
-        mock_session_storage.load_sessions = MagicMock(return_value=[])
+        mock_session_storage.load_sessions_raw = MagicMock(return_value=[])
 
         with patch(
             "api.routers.sessions.get_user_session_storage",
@@ -196,11 +196,9 @@ class TestLoginEndpoint:
         assert response.status_code == 200
         data = response.json()
 
-        # The verify_password function returns False early for inactive users
-        # So we get the generic invalid credentials error
+        # authenticate() rejects inactive users the same way as bad
+        # credentials, so we get the generic invalid credentials error
         assert data["success"] is False
-        # The error is "Invalid username or password" because verify_password
-        # checks is_active and returns False before the router check
         assert data["error"] == "Invalid username or password"
 
     def test_login_with_admin_user(self, client):
@@ -1310,3 +1310,42 @@ class TestQuestionHandlingIntegration:
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+class TestWebSocketChatCleanup:
+    """Tests for resource cleanup when websocket_chat ends."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "loop_error", [WebSocketDisconnect(code=1000), RuntimeError("boom")]
+    )
+    async def test_history_handles_closed_on_exit(self, tmp_path, loop_error):
+        """Test that the finally block flushes and closes history handles."""
+        from agent.core.storage import HistoryStorage
+        from api.routers.websocket import websocket_chat
+
+        history = HistoryStorage(data_dir=tmp_path)
+
+        async def run_loop(websocket, client, state, session_storage, history, *args, **kwargs):
+            history.append_message("session-1", "user", "hello")
+            raise loop_error
+
+        websocket = MockWebSocket()
+        client = MagicMock()
+        client.disconnect = AsyncMock()
+
+        with patch("api.routers.websocket._wait_for_authentication",
+                   AsyncMock(return_value=("user-1", "jti", "testuser"))), \
+             patch("api.routers.websocket.get_user_session_storage", return_value=MockSessionStorage()), \
+             patch("api.routers.websocket.get_user_history_storage", return_value=history), \
+             patch("api.routers.websocket._resolve_session", AsyncMock(return_value=(None, None))), \
+             patch("api.routers.websocket.create_agent_sdk_options"), \
+             patch("api.routers.websocket.ClaudeSDKClient", return_value=client), \
+             patch("api.routers.websocket._connect_sdk_client", AsyncMock()), \
+             patch("api.routers.websocket._run_message_loop", run_loop):
+            await websocket_chat(websocket)
+
+        client.disconnect.assert_awaited_once()
+        assert history._writers == {}
+        reader = HistoryStorage(data_dir=tmp_path)
+        assert reader.get_message_count("session-1") == 1
@@ -4,6 +4,7 @@ import json
 from unittest.mock import MagicMock
 
 
+from agent.core.storage import HistoryStorage
 from api.constants import EventType, MessageRole
 from api.services.history_tracker import HistoryTracker
 
@@ -203,6 +204,15 @@ class TestHistoryTracker:
 
         mock_history.append_message.assert_not_called()
 
+    def test_finalize_flushes_history(self):
+        """Test that finalizing flushes buffered history for the session."""
+        mock_history = MagicMock()
+        tracker = HistoryTracker(session_id="test-session", history=mock_history)
+
+        tracker.finalize_assistant_response()
+
+        mock_history.flush.assert_called_once_with("test-session")
+
     def test_finalize_clears_accumulated_text(self):
         """Test that finalizing clears accumulated text."""
         mock_history = MagicMock()
@@ -286,3 +296,47 @@ class TestHistoryTracker:
         tracker.process_event("unknown_event", {"data": "value"})
 
         mock_history.append_message.assert_not_called()
+
+
+class TestHistoryTrackerVisibility:
+    """Tests for when a turn becomes visible to other storage instances."""
+
+    def test_turn_visible_to_other_instance_mid_turn(self, tmp_path):
+        """Test that a second HistoryStorage sees messages as they are saved.
+
+        This is what the REST history endpoint observes while a WebSocket
+        session is mid-turn: everything but the accumulating assistant text
+        is visible before the DONE event.
+        """
+        writer = HistoryStorage(data_dir=tmp_path)
+        reader = HistoryStorage(data_dir=tmp_path)
+        tracker = HistoryTracker(session_id="test-session", history=writer)
+
+        tracker.save_user_message("Hi")
+        tracker.process_event(EventType.TOOL_USE, {"name": "Read", "id": "t1", "input": {}})
+        tracker.process_event(EventType.TEXT_DELTA, {"text": "Hello"})
+
+        assert [m["role"] for m in reader.get_messages_dict("test-session")] == [
+            MessageRole.USER, MessageRole.TOOL_USE
+        ]
+
+        tracker.process_event(EventType.DONE, {})
+
+        messages = reader.get_messages_dict("test-session")
+        assert [m["role"] for m in messages] == [
+            MessageRole.USER, MessageRole.TOOL_USE, MessageRole.ASSISTANT
+        ]
+        assert messages[-1]["content"] == "Hello"
+        writer.close()
+
+    def test_finalize_without_text_still_flushes(self, tmp_path):
+        """Test that tool-only turns are flushed on finalize."""
+        writer = HistoryStorage(data_dir=tmp_path)
+        reader = HistoryStorage(data_dir=tmp_path)
+        tracker = HistoryTracker(session_id="test-session", history=writer)
+
+        tracker.save_user_message("Run it")
+        tracker.finalize_assistant_response()
+
+        assert reader.get_message_count("test-session") == 1
+        writer.close()